@@ -0,0 +1,166 @@
+# app/agents/db_async.py
+"""
+Asyncio counterparts of the db_writer helpers, on SQLAlchemy's asyncio
+engine, so an asyncio pipeline can keep scraping, LLM calls and database
+writes in flight at once.
+
+DATABASE_URL is reused with its driver swapped for an async one
+(postgresql -> asyncpg, sqlite -> aiosqlite). The upserts are the very
+statements db_writer runs, so both layers have the same semantics. Engines
+are cached per URL like db_writer.get_engine, but their connections belong
+to the event loop that opened them: await dispose_engines() before that
+loop closes.
+"""
+
+import asyncio
+import os
+from typing import Dict
+
+from sqlalchemy import insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import StaticPool
+
+from app.agents.db_writer import (
+    DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    Analysis,
+    Article,
+    Base,
+    StockPrice,
+    article_upsert,
+    is_memory_sqlite,
+    stock_price_upsert,
+)
+
+# Async DBAPI driver for each sync backend
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+_engines: Dict[str, AsyncEngine] = {}
+_sessionmakers: Dict[str, async_sessionmaker] = {}
+
+
+def async_url(db_url: str = None):
+    """`db_url` (default DATABASE_URL) with its driver swapped for an async one."""
+    url = make_url(db_url or os.getenv("DATABASE_URL"))
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver and url.get_driver_name() != driver:
+        url = url.set(drivername=f"{url.get_backend_name()}+{driver}")
+    return url
+
+
+def get_async_engine(db_url: str = None) -> AsyncEngine:
+    """
+    The cached async engine for `db_url`, pooled like db_writer.get_engine.
+    """
+    db_url = db_url or os.getenv("DATABASE_URL")
+    engine = _engines.get(db_url)
+    if engine is None:
+        url = async_url(db_url)
+        if is_memory_sqlite(url):
+            kwargs = {"poolclass": StaticPool}
+        else:
+            kwargs = {
+                "pool_size": DB_POOL_SIZE,
+                "max_overflow": DB_MAX_OVERFLOW,
+                "pool_recycle": DB_POOL_RECYCLE,
+                "pool_pre_ping": True,
+            }
+        try:
+            engine = create_async_engine(url, echo=False, **kwargs)
+        except ImportError as e:
+            raise RuntimeError(
+                f"The async database layer needs `pip install {url.get_driver_name()}`"
+            ) from e
+        _engines[db_url] = engine
+        # Keep rows usable after commit without another (awaited) refresh
+        _sessionmakers[db_url] = async_sessionmaker(engine, expire_on_commit=False)
+    return engine
+
+
+def get_async_session(db_url: str = None) -> AsyncSession:
+    """An AsyncSession on the cached engine for `db_url`; close it when done."""
+    db_url = db_url or os.getenv("DATABASE_URL")
+    get_async_engine(db_url)
+    return _sessionmakers[db_url]()
+
+
+async def init_db(db_url: str = None) -> None:
+    """Create any missing tables and indexes, as db_writer.init_db."""
+    async with get_async_engine(db_url).begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def dispose_engines() -> None:
+    """Close every cached async engine's pool."""
+    engines = list(_engines.values())
+    _engines.clear()
+    _sessionmakers.clear()
+    await asyncio.gather(*(engine.dispose() for engine in engines))
+
+
+async def upsert_article(
+    session: AsyncSession, url: str, title: str, body: str, publish_date
+) -> Article:
+    """
+    Insert or update an article record based on its URL.
+    """
+    art = await session.scalar(
+        article_upsert(url, title, body, publish_date).returning(Article),
+        execution_options={"populate_existing": True},
+    )
+    await session.commit()
+    return art
+
+
+async def insert_analysis(
+    session: AsyncSession,
+    article_id: int,
+    sentiment_label: str,
+    sentiment_score: float,
+    recommendation: str,
+    rationale: str,
+    price_date=None,
+    prompt_tokens: int = None,
+) -> Analysis:
+    """
+    Add a new analysis record for a given article. RETURNING loads the
+    server-side defaults (analysis_date) in the same round trip.
+    """
+    ana = await session.scalar(
+        insert(Analysis)
+        .values(
+            article_id=article_id,
+            sentiment_label=sentiment_label,
+            sentiment_score=sentiment_score,
+            recommendation=recommendation,
+            rationale=rationale,
+            price_date=price_date,
+            prompt_tokens=prompt_tokens,
+        )
+        .returning(Analysis)
+    )
+    await session.commit()
+    return ana
+
+
+async def upsert_stock_price(
+    session: AsyncSession, price_date, open_p, close_p, high_p, low_p, volume
+) -> StockPrice:
+    """
+    Insert or update a stock price record for a trading day.
+    """
+    price = await session.scalar(
+        stock_price_upsert(
+            price_date, open_p, close_p, high_p, low_p, volume
+        ).returning(StockPrice),
+        execution_options={"populate_existing": True},
+    )
+    await session.commit()
+    return price
@@ -1,5 +1,10 @@
 # cspell:disable
+import io
 import os
+import threading
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Dict, Iterable, List, Sequence, Tuple
 
 from sqlalchemy import (
     TIMESTAMP,
@@ -8,15 +13,32 @@ from sqlalchemy import (
     Date,
     Float,
     ForeignKey,
+    Index,
     Integer,
     Numeric,
     String,
     Text,
     create_engine,
+    delete,
     func,
+    or_,
+    select,
+    tuple_,
+    update,
 )
 from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import declarative_base, relationship, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Connection pool settings for get_engine (not used for in-memory SQLite)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds
+
+_engines: Dict[str, Engine] = {}
+_sessionmakers: Dict[str, sessionmaker] = {}
+_engines_lock = threading.Lock()
 
 # Declarative base for ORM models
 Base = declarative_base()
@@ -34,6 +56,7 @@ class Article(Base):
     )
 
     analyses = relationship("Analysis", back_populates="article")
+    tickers = relationship("ArticleTicker", back_populates="article")
 
 
 class Analysis(Base):
@@ -50,9 +73,15 @@ class Analysis(Base):
         TIMESTAMP(timezone=True), server_default=func.now(), nullable=False
     )
     price_date = Column(Date)
+    prompt_tokens = Column(Integer)
 
     article = relationship("Article", back_populates="analyses")
 
+    # Serves "analyzed on this day" lookups per article as well as joins
+    __table_args__ = (
+        Index("idx_analysis_article_date", "article_id", "analysis_date"),
+    )
+
 
 class StockPrice(Base):
     __tablename__ = "stock_prices"  # noqa: cspell
@@ -64,22 +93,114 @@ class StockPrice(Base):
     volume = Column(BigInteger)
 
 
-def get_session(db_url: str = None):
+class ArticleTicker(Base):
+    __tablename__ = "article_tickers"  # noqa: cspell
+    article_id = Column(
+        Integer,
+        ForeignKey("articles.article_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    ticker = Column(String(16), primary_key=True)
+
+    article = relationship("Article", back_populates="tickers")
+
+    # Articles by ticker; the primary key only serves lookups by article
+    __table_args__ = (Index("idx_article_tickers_ticker", "ticker"),)
+
+
+class ScrapeCursor(Base):
+    __tablename__ = "scrape_cursors"  # noqa: cspell
+    query = Column(Text, primary_key=True)
+    last_published_at = Column(TIMESTAMP(timezone=True), nullable=False)
+    last_url = Column(Text)
+    updated_at = Column(
+        TIMESTAMP(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+
+class SentimentCache(Base):
+    __tablename__ = "sentiment_cache"  # noqa: cspell
+    model_id = Column(String(255), primary_key=True)
+    text_hash = Column(String(64), primary_key=True)
+    sentiment_label = Column(String(32), nullable=False)
+    sentiment_score = Column(Float, nullable=False)
+    created_at = Column(
+        TIMESTAMP(timezone=True), server_default=func.now(), nullable=False
+    )
+    last_used_at = Column(
+        TIMESTAMP(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    # prune_sentiment_cache evicts by age and least-recent use
+    __table_args__ = (Index("idx_sentiment_cache_last_used", "last_used_at"),)
+
+
+def is_memory_sqlite(url) -> bool:
+    """Whether `url` (a sqlalchemy URL) names a private in-memory SQLite db."""
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def get_engine(db_url: str = None):
     """
-    Create a SQLAlchemy session.
-    Reads DATABASE_URL from the environment if db_url is not provided.
+    The process-wide engine (and connection pool) for `db_url`, created on
+    first use. Reads DATABASE_URL from the environment if db_url is not
+    provided; pool sizing comes from the DB_POOL_* settings above.
     """
     db_url = db_url or os.getenv("DATABASE_URL")
-    engine = create_engine(db_url, echo=False, future=True)
-    Base.metadata.create_all(engine)
-    return sessionmaker(bind=engine)()
+    with _engines_lock:
+        engine = _engines.get(db_url)
+        if engine is None:
+            url = make_url(db_url)
+            if is_memory_sqlite(url):
+                # One connection, so every session sees the same database
+                kwargs = {
+                    "poolclass": StaticPool,
+                    "connect_args": {"check_same_thread": False},
+                }
+            else:
+                kwargs = {
+                    "pool_size": DB_POOL_SIZE,
+                    "max_overflow": DB_MAX_OVERFLOW,
+                    "pool_recycle": DB_POOL_RECYCLE,
+                    "pool_pre_ping": True,
+                }
+            engine = create_engine(url, echo=False, future=True, **kwargs)
+            _engines[db_url] = engine
+            _sessionmakers[db_url] = sessionmaker(bind=engine)
+        return engine
 
 
-def upsert_article(session, url: str, title: str, body: str, publish_date):
+def dispose_engines() -> None:
+    """Close every cached engine's pool, e.g. after forking or in tests."""
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+        _sessionmakers.clear()
+
+
+def init_db(db_url: str = None) -> None:
+    """Create any missing tables and indexes (schema.sql is the reference)."""
+    Base.metadata.create_all(get_engine(db_url))
+
+
+def get_session(db_url: str = None):
     """
-    Insert or update an article record based on its URL.
+    Create a SQLAlchemy session on the cached engine for `db_url` (see
+    get_engine). The schema must already exist; see init_db. Close the
+    session when done to return its connection to the pool.
     """
-    stmt = (
+    db_url = db_url or os.getenv("DATABASE_URL")
+    get_engine(db_url)
+    return _sessionmakers[db_url]()
+
+
+def article_upsert(url: str, title: str, body: str, publish_date):
+    """The INSERT ... ON CONFLICT (url) DO UPDATE behind upsert_article."""
+    return (
         insert(Article)
         .values(url=url, title=title, body_text=body, publish_date=publish_date)
         .on_conflict_do_update(
@@ -92,11 +213,99 @@ def upsert_article(session, url: str, title: str, body: str, publish_date):
             },
         )
     )
-    session.execute(stmt)
+
+
+def upsert_article(session, url: str, title: str, body: str, publish_date):
+    """
+    Insert or update an article record based on its URL.
+    """
+    session.execute(article_upsert(url, title, body, publish_date))
     session.commit()
     return session.query(Article).filter_by(url=url).one()
 
 
+def upsert_articles(session, rows: Sequence[Dict], chunk_size: int = 500):
+    """
+    Insert or update many articles (dicts with url, title, body_text and
+    publish_date) in one transaction, one multi-row INSERT ... ON CONFLICT
+    per `chunk_size` rows, and return {url: article_id}.
+
+    Rows whose title, body and publish date are unchanged are not updated
+    at all (no dead tuples, fetched_at kept); their ids are looked up in a
+    single follow-up SELECT per chunk. Later duplicates of a URL win.
+    """
+    ids: Dict[str, int] = {}
+    unique = list({row["url"]: row for row in rows}.values())
+    for start in range(0, len(unique), chunk_size):
+        chunk = unique[start : start + chunk_size]
+        stmt = insert(Article).values(
+            [
+                {
+                    "url": row["url"],
+                    "title": row["title"],
+                    "body_text": row["body_text"],
+                    "publish_date": row["publish_date"],
+                }
+                for row in chunk
+            ]
+        )
+        new = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["url"],
+            set_={
+                "title": new.title,
+                "body_text": new.body_text,
+                "publish_date": new.publish_date,
+                "fetched_at": func.now(),
+            },
+            where=or_(
+                Article.title.is_distinct_from(new.title),
+                Article.body_text.is_distinct_from(new.body_text),
+                Article.publish_date.is_distinct_from(new.publish_date),
+            ),
+        ).returning(Article.article_id, Article.url)
+        for article_id, url in session.execute(stmt):
+            ids[url] = article_id
+
+        unchanged = [row["url"] for row in chunk if row["url"] not in ids]
+        if unchanged:
+            found = session.execute(
+                select(Article.article_id, Article.url).where(
+                    Article.url.in_(unchanged)
+                )
+            )
+            for article_id, url in found:
+                ids[url] = article_id
+    session.commit()
+    return ids
+
+
+def link_article_ticker(session, article_id: int, ticker: str):
+    """
+    Record that an article matched `ticker`; linking twice is a no-op.
+    """
+    stmt = (
+        insert(ArticleTicker)
+        .values(article_id=article_id, ticker=ticker)
+        .on_conflict_do_nothing(index_elements=["article_id", "ticker"])
+    )
+    session.execute(stmt)
+    session.commit()
+
+
+def link_article_tickers(session, links: Sequence[Tuple[int, str]]):
+    """Bulk `link_article_ticker` for (article_id, ticker) pairs."""
+    if not links:
+        return
+    stmt = (
+        insert(ArticleTicker)
+        .values([{"article_id": a, "ticker": t} for a, t in set(links)])
+        .on_conflict_do_nothing(index_elements=["article_id", "ticker"])
+    )
+    session.execute(stmt)
+    session.commit()
+
+
 def insert_analysis(
     session,
     article_id: int,
@@ -105,9 +314,11 @@ def insert_analysis(
     recommendation: str,
     rationale: str,
     price_date=None,
+    prompt_tokens: int = None,
 ):
     """
-    Add a new analysis record for a given article.
+    Add a new analysis record for a given article. `prompt_tokens` is the
+    size of the LLM prompt behind the recommendation, if one was made.
     """
     ana = Analysis(
         article_id=article_id,
@@ -116,17 +327,90 @@ def insert_analysis(
         recommendation=recommendation,
         rationale=rationale,
         price_date=price_date,
+        prompt_tokens=prompt_tokens,
     )
     session.add(ana)
     session.commit()
     return ana
 
 
-def upsert_stock_price(session, price_date, open_p, close_p, high_p, low_p, volume):
+def _copy_value(value) -> str:
+    """One field in PostgreSQL COPY text format."""
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _copy_buffer(rows: List[Dict], columns: List[str]) -> io.StringIO:
+    """Rows as a COPY ... FROM STDIN text-format buffer."""
+    buf = io.StringIO()
+    for row in rows:
+        buf.write("\t".join(_copy_value(row.get(c)) for c in columns) + "\n")
+    buf.seek(0)
+    return buf
+
+
+def _copy_analyses(session, rows: List[Dict]) -> bool:
     """
-    Insert or update a stock price record for a trading day.
+    Stream `rows` into analysis with COPY; returns False if the DBAPI
+    driver has no COPY support, leaving the caller to insert them.
     """
+    keys = set().union(*rows)
+    columns = [c.name for c in Analysis.__table__.columns if c.name in keys]
+    with session.connection().connection.cursor() as cursor:
+        if not hasattr(cursor, "copy_expert"):
+            return False
+        cursor.copy_expert(
+            f"COPY analysis ({', '.join(columns)}) FROM STDIN",
+            _copy_buffer(rows, columns),
+        )
+    return True
+
+
+def insert_analyses(session, rows: Iterable[Dict], commit_every: int = 5000) -> int:
+    """
+    Bulk-add analysis records, each a dict of Analysis columns
+    (article_id, sentiment_label, ...). `rows` may be any iterable and is
+    consumed `commit_every` rows at a time, one transaction per chunk: on
+    PostgreSQL each chunk is streamed with COPY, elsewhere it is a single
+    executemany INSERT. Returns the number of rows written.
+    """
+    use_copy = session.get_bind().dialect.name == "postgresql"
+    rows = iter(rows)
+    total = 0
+    while chunk := list(islice(rows, commit_every)):
+        if not (use_copy and _copy_analyses(session, chunk)):
+            session.execute(insert(Analysis), chunk)
+        session.commit()
+        total += len(chunk)
+    return total
+
+
+def get_unanalyzed_articles(session, limit: int = None) -> List["Article"]:
+    """Articles that have never been analyzed, oldest first."""
     stmt = (
+        select(Article)
+        .where(
+            ~select(Analysis.analysis_id)
+            .where(Analysis.article_id == Article.article_id)
+            .exists()
+        )
+        .order_by(Article.publish_date, Article.article_id)
+    )
+    if limit:
+        stmt = stmt.limit(limit)
+    return list(session.scalars(stmt))
+
+
+def stock_price_upsert(price_date, open_p, close_p, high_p, low_p, volume):
+    """The INSERT ... ON CONFLICT (price_date) DO UPDATE behind upsert_stock_price."""
+    return (
         insert(StockPrice)
         .values(
             price_date=price_date,
@@ -147,6 +431,126 @@ def upsert_stock_price(session, price_date, open_p, close_p, high_p, low_p, volu
             },
         )
     )
-    session.execute(stmt)
+
+
+def upsert_stock_price(session, price_date, open_p, close_p, high_p, low_p, volume):
+    """
+    Insert or update a stock price record for a trading day.
+    """
+    session.execute(
+        stock_price_upsert(price_date, open_p, close_p, high_p, low_p, volume)
+    )
     session.commit()
     return session.query(StockPrice).get(price_date)
+
+
+def get_scrape_cursor(session, query: str):
+    """
+    Return the ScrapeCursor high-water mark for `query`, or None if the
+    query has never been scraped.
+    """
+    return session.get(ScrapeCursor, query)
+
+
+def upsert_scrape_cursor(session, query: str, last_published_at, last_url=None):
+    """
+    Insert or advance the high-water mark for `query`.
+    """
+    stmt = (
+        insert(ScrapeCursor)
+        .values(query=query, last_published_at=last_published_at, last_url=last_url)
+        .on_conflict_do_update(
+            index_elements=["query"],
+            set_={
+                "last_published_at": last_published_at,
+                "last_url": last_url,
+                "updated_at": func.now(),
+            },
+        )
+    )
+    session.execute(stmt)
+    session.commit()
+    return session.get(ScrapeCursor, query, populate_existing=True)
+
+
+def get_cached_sentiments(session, model_id: str, text_hashes) -> Dict[str, Tuple]:
+    """
+    Look up cached (label, score) results for `text_hashes` under
+    `model_id` and mark the found rows as recently used.
+    """
+    text_hashes = list(text_hashes)
+    if not text_hashes:
+        return {}
+    rows = session.execute(
+        select(
+            SentimentCache.text_hash,
+            SentimentCache.sentiment_label,
+            SentimentCache.sentiment_score,
+        ).where(
+            SentimentCache.model_id == model_id,
+            SentimentCache.text_hash.in_(text_hashes),
+        )
+    ).all()
+    found = {h: (label, score) for h, label, score in rows}
+    if found:
+        session.execute(
+            update(SentimentCache)
+            .where(
+                SentimentCache.model_id == model_id,
+                SentimentCache.text_hash.in_(list(found)),
+            )
+            .values(last_used_at=func.now())
+        )
+        session.commit()
+    return found
+
+
+def store_cached_sentiments(session, model_id: str, results: Dict[str, Tuple]):
+    """
+    Cache (label, score) results keyed by text hash; existing rows are kept.
+    """
+    if not results:
+        return
+    stmt = (
+        insert(SentimentCache)
+        .values(
+            [
+                {
+                    "model_id": model_id,
+                    "text_hash": h,
+                    "sentiment_label": label,
+                    "sentiment_score": score,
+                }
+                for h, (label, score) in results.items()
+            ]
+        )
+        .on_conflict_do_nothing(index_elements=["model_id", "text_hash"])
+    )
+    session.execute(stmt)
+    session.commit()
+
+
+def prune_sentiment_cache(session, max_age: timedelta = None, max_rows: int = None):
+    """
+    Evict sentiment cache rows unused for longer than `max_age`, then the
+    least recently used rows beyond `max_rows`. Returns the number deleted.
+    """
+    deleted = 0
+    if max_age is not None:
+        cutoff = datetime.now(timezone.utc) - max_age
+        deleted += session.execute(
+            delete(SentimentCache).where(SentimentCache.last_used_at < cutoff)
+        ).rowcount
+    if max_rows is not None:
+        keep = (
+            select(SentimentCache.model_id, SentimentCache.text_hash)
+            .order_by(SentimentCache.last_used_at.desc())
+            .limit(max_rows)
+        )
+        deleted += session.execute(
+            delete(SentimentCache).where(
+                tuple_(SentimentCache.model_id, SentimentCache.text_hash).not_in(keep)
+            )
+        ).rowcount
+    session.commit()
+    return deleted
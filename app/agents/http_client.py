@@ -0,0 +1,145 @@
+# app/agents/http_client.py
+"""
+Shared, pooled HTTP client for the outbound agents.
+
+One process-wide `requests.Session` keeps TCP/TLS connections alive between
+calls, caps connections per host, and retries transient failures (connection
+errors, 429 and 5xx) with exponential backoff plus jitter, honouring a
+`Retry-After` header when the server sends one.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "30"))
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_sleep = time.sleep
+
+
+@dataclass
+class RequestStats:
+    """Per-call timings: attempts made, retries, final status, total latency."""
+
+    url: str
+    attempts: int = 0
+    retries: int = 0
+    status: Optional[int] = None
+    latency: float = 0.0
+
+
+def get_http_session() -> requests.Session:
+    """
+    Return the process-wide pooled session, creating it on first use.
+    `pool_block` makes the per-host connection cap a hard limit.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=POOL_MAXSIZE,
+                    pool_maxsize=POOL_MAXSIZE,
+                    pool_block=True,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    """Parse a Retry-After header given in seconds or as an HTTP date."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff for the given (1-based) attempt."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1)))
+
+
+def request(
+    method: str,
+    url: str,
+    max_retries: Optional[int] = None,
+    timeout: float = 5,
+    **kwargs,
+) -> Tuple[requests.Response, RequestStats]:
+    """
+    Send a request through the shared session, retrying transient failures.
+
+    Returns (response, stats). After the last retry a 429/5xx response is
+    returned as-is so the caller's `raise_for_status()` decides; connection
+    errors are re-raised.
+    """
+    retries = MAX_RETRIES if max_retries is None else max_retries
+    session = get_http_session()
+    stats = RequestStats(url=url)
+    start = time.perf_counter()
+    try:
+        while True:
+            stats.attempts += 1
+            try:
+                response = session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if stats.retries >= retries:
+                    raise
+                delay = _backoff(stats.attempts)
+                logger.warning(
+                    "%s %s failed (%s); retrying in %.2fs", method, url, e, delay
+                )
+            else:
+                stats.status = response.status_code
+                if (
+                    response.status_code not in RETRY_STATUSES
+                    or stats.retries >= retries
+                ):
+                    return response, stats
+                delay = _retry_after(response)
+                if delay is None:
+                    delay = _backoff(stats.attempts)
+                delay = min(delay, BACKOFF_MAX)
+                logger.warning(
+                    "%s %s returned %d; retrying in %.2fs",
+                    method,
+                    url,
+                    response.status_code,
+                    delay,
+                )
+                response.close()
+            stats.retries += 1
+            _sleep(delay)
+    finally:
+        stats.latency = time.perf_counter() - start
+
+
+def get(url: str, **kwargs) -> Tuple[requests.Response, RequestStats]:
+    """GET through the shared session; see `request`."""
+    return request("GET", url, **kwargs)
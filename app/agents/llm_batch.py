@@ -0,0 +1,237 @@
+# app/agents/llm_batch.py
+"""
+Offline recommendation backfills through the OpenAI Batch API.
+
+A backfill writes one chat request per article to `requests.jsonl` in a
+work directory, uploads it as a batch job, polls the job until it
+finishes, then bulk-inserts the recommendations into `analysis`. Progress
+is kept in `state.json` next to the requests, so re-running with the same
+work directory resumes where it stopped (before or after upload, or while
+polling) instead of paying for the batch again, and never ingests an
+article twice.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+
+from app.agents.db_writer import insert_analyses
+from app.agents.llm_recommender import (
+    MODEL,
+    ArticleRecc,
+    build_messages,
+    clean_json_response,
+    count_prompt_tokens,
+)
+
+logger = logging.getLogger(__name__)
+
+ENDPOINT = "/v1/chat/completions"
+# Batch statuses after which the job will not change any more
+TERMINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+
+
+class BatchError(Exception):
+    """Raised when a batch job ends without results."""
+
+
+class BatchState:
+    """Resumable progress of one backfill, stored as JSON in `workdir`."""
+
+    def __init__(self, workdir: str):
+        self.workdir = workdir
+        self.path = os.path.join(workdir, "state.json")
+        os.makedirs(workdir, exist_ok=True)
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.data = json.load(f)
+        except FileNotFoundError:
+            self.data = {"items": {}, "ingested": []}
+
+    def __getitem__(self, key):
+        return self.data.get(key)
+
+    def __setitem__(self, key, value) -> None:
+        self.data[key] = value
+        self.save()
+
+    def save(self) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self.workdir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.data, f)
+        os.replace(tmp, self.path)
+
+
+def build_requests(
+    items: Iterable[Tuple[str, str, str, float]],
+) -> List[Dict]:
+    """Batch-API request lines for (custom_id, title, text, score) items."""
+    return [
+        {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": ENDPOINT,
+            "body": {
+                "model": MODEL,
+                "messages": build_messages(title, text, score),
+                "temperature": 0.0,
+            },
+        }
+        for custom_id, title, text, score in items
+    ]
+
+
+def parse_results(
+    lines: Iterable[str],
+) -> Dict[str, Union[ArticleRecc, Exception]]:
+    """
+    Map custom_id to the validated ArticleRecc from a batch output (or
+    error) file, or to the error for requests that failed or returned
+    malformed JSON.
+    """
+    results: Dict[str, Union[ArticleRecc, Exception]] = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        row = json.loads(line)
+        response = row.get("response") or {}
+        if row.get("error") or response.get("status_code") != 200:
+            results[row["custom_id"]] = BatchError(
+                str(row.get("error") or response.get("status_code"))
+            )
+            continue
+        body = response["body"]
+        try:
+            rec = ArticleRecc.model_validate_json(
+                clean_json_response(body["choices"][0]["message"]["content"])
+            )
+        except ValidationError as e:
+            results[row["custom_id"]] = e
+            continue
+        rec.prompt_tokens = (body.get("usage") or {}).get("prompt_tokens")
+        results[row["custom_id"]] = rec
+    return results
+
+
+def wait_for_batch(
+    client,
+    batch_id: str,
+    poll_interval: float = 60.0,
+    timeout: Optional[float] = None,
+    sleep: Callable[[float], None] = time.sleep,
+):
+    """Poll a batch until it reaches a terminal status; returns the batch."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        counts = getattr(batch, "request_counts", None)
+        logger.info("Batch %s: %s %s", batch_id, batch.status, counts or "")
+        if batch.status in TERMINAL_STATUSES:
+            return batch
+        if deadline is not None and time.monotonic() > deadline:
+            raise TimeoutError(f"Batch {batch_id} still {batch.status}")
+        sleep(poll_interval)
+
+
+def run_backfill(
+    session,
+    client,
+    workdir: str,
+    articles: Iterable[Tuple[int, str, str, str, float]] = (),
+    poll_interval: float = 60.0,
+    timeout: Optional[float] = None,
+    commit_every: int = 5000,
+) -> Dict[str, int]:
+    """
+    Backfill recommendations for `articles` given as (article_id, title,
+    body, sentiment_label, sentiment_score) tuples.
+
+    A fresh `workdir` records the articles, writes requests.jsonl and
+    submits it; a `workdir` from an earlier run resumes that run and
+    ignores `articles`. Results are inserted `commit_every` rows per
+    transaction. Returns counts of ingested and failed requests.
+    """
+    state = BatchState(workdir)
+    articles = list(articles)
+    requests_path = os.path.join(workdir, "requests.jsonl")
+
+    if not state["items"]:
+        items = {
+            f"article-{article_id}": {
+                "article_id": article_id,
+                "sentiment_label": label,
+                "sentiment_score": score,
+                "prompt_tokens": count_prompt_tokens(
+                    build_messages(title, body, score)
+                ),
+            }
+            for article_id, title, body, label, score in articles
+        }
+        if not items:
+            return {"ingested": 0, "failed": 0}
+        lines = build_requests(
+            (f"article-{a}", title, body, score)
+            for a, title, body, _, score in articles
+        )
+        with open(requests_path, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(line) + "\n" for line in lines)
+        state["items"] = items
+        logger.info("Wrote %d batch requests to %s", len(items), requests_path)
+
+    if not state["input_file_id"]:
+        with open(requests_path, "rb") as f:
+            state["input_file_id"] = client.files.create(file=f, purpose="batch").id
+    if not state["batch_id"]:
+        state["batch_id"] = client.batches.create(
+            input_file_id=state["input_file_id"],
+            endpoint=ENDPOINT,
+            completion_window="24h",
+        ).id
+        logger.info("Submitted batch %s", state["batch_id"])
+
+    batch = wait_for_batch(client, state["batch_id"], poll_interval, timeout)
+    if batch.status != "completed" or not (batch.output_file_id or batch.error_file_id):
+        raise BatchError(f"Batch {batch.id} ended as {batch.status}")
+
+    results: Dict[str, Union[ArticleRecc, Exception]] = {}
+    for file_id in (batch.error_file_id, batch.output_file_id):
+        if file_id:
+            results.update(
+                parse_results(client.files.content(file_id).text.splitlines())
+            )
+
+    done = set(state["ingested"])
+    rows, failed = [], []
+    for custom_id, item in state["items"].items():
+        if custom_id in done:
+            continue
+        rec = results.get(custom_id)
+        if not isinstance(rec, ArticleRecc):
+            failed.append(custom_id)
+            continue
+        rows.append(
+            {
+                "article_id": item["article_id"],
+                "sentiment_label": item["sentiment_label"],
+                "sentiment_score": item["sentiment_score"],
+                "recommendation": rec.recommendation.value,
+                "rationale": rec.rationale,
+                "prompt_tokens": rec.prompt_tokens or item["prompt_tokens"],
+            }
+        )
+    # Record each chunk as ingested as soon as it commits, so a resume
+    # after a crash mid-ingest starts at the first uncommitted chunk
+    for start in range(0, len(rows), commit_every):
+        chunk = rows[start : start + commit_every]
+        insert_analyses(session, chunk, commit_every=len(chunk))
+        done |= {f"article-{r['article_id']}" for r in chunk}
+        state["ingested"] = sorted(done)
+    state["failed"] = failed
+    if failed:
+        logger.warning("%d batch requests failed; see %s", len(failed), state.path)
+    return {"ingested": len(rows), "failed": len(failed)}
@@ -1,10 +1,19 @@
+import asyncio
+import hashlib
+import json
 import logging
 import os
 import re
+import threading
+import time
+from collections import deque
 from enum import Enum
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
 
-from openai import OpenAI, OpenAIError
-from pydantic import BaseModel, Field
+from openai import AsyncOpenAI, OpenAI, OpenAIError
+from pydantic import BaseModel, Field, ValidationError
+
+from app.agents.response_cache import cache_from_env
 
 
 # Custom exception for API failures
@@ -26,34 +35,178 @@ class ArticleRecc(BaseModel):
     sentiment_score: float = Field(..., ge=-1.0, le=1.0)
     recommendation: Recommendation
     rationale: str
+    # Filled in by recommend(), not by the model
+    prompt_tokens: Optional[int] = None
 
 
 # LLM client setup
+MODEL = "gpt-3.5-turbo"
+# Concurrent-call settings for recommend_many; defaults sit under the
+# gpt-3.5-turbo tier-1 limits
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))
+LLM_REQUESTS_PER_MIN = float(os.getenv("LLM_REQUESTS_PER_MIN", "500"))
+LLM_TOKENS_PER_MIN = float(os.getenv("LLM_TOKENS_PER_MIN", "200000"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+# Upper bound on completion tokens reserved per call by the rate limiter
+LLM_RESPONSE_TOKENS = 200
+# Token budget for the article text in each prompt
+LLM_PROMPT_TOKENS = int(os.getenv("LLM_PROMPT_TOKENS", "1200"))
+# Tail-latency controls: hedge a call that outlives the recent p95 latency
+# (LLM_HEDGE_DELAY seconds until enough calls are seen; 0 disables), and
+# fast-fail for LLM_BREAKER_COOLDOWN seconds after LLM_BREAKER_FAILURES
+# consecutive failures
+LLM_HEDGE_DELAY = float(os.getenv("LLM_HEDGE_DELAY", "8"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+# recommend_packed: articles per request and token budget for their texts
+LLM_PACK_SIZE = int(os.getenv("LLM_PACK_SIZE", "8"))
+LLM_PACK_TOKENS = int(os.getenv("LLM_PACK_TOKENS", "6000"))
+
 _logger = logging.getLogger(__name__)
-_api_key = os.getenv("OPENAI_API_KEY")
-if not _api_key:
-    raise RuntimeError("Please set OPENAI_API_KEY in your environment")
-_client = OpenAI(api_key=_api_key)
+_cache_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+_encoding = None
+_encoding_lock = threading.Lock()
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> OpenAI:
+    """
+    Return the shared OpenAI client, creating it on first use so importing
+    this module needs no API key.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                api_key = os.getenv("OPENAI_API_KEY")
+                if not api_key:
+                    raise RuntimeError("Please set OPENAI_API_KEY in your environment")
+                _client = OpenAI(api_key=api_key)
+    return _client
+
+
+def warm_up() -> None:
+    """Create the client ahead of the first request (for long-lived workers)."""
+    get_client()
 
 
 def clean_json_response(text: str) -> str:
-    """Strip markdown fences from JSON responses."""
-    fence_re = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
+    """Strip markdown fences from JSON (object or array) responses."""
+    fence_re = re.compile(r"```(?:json)?\s*([\[{].*?[\]}])\s*```", re.DOTALL)
     m = fence_re.search(text)
     return m.group(1) if m else text.strip()
 
 
-def recommend(title: str, text: str, score: float) -> ArticleRecc:
+# ---------- prompt budget ----------
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_FINANCE_TERMS = frozenset(
+    "revenue earnings profit loss guidance forecast outlook sales margin "
+    "shares stock investors analysts quarter quarterly billion million "
+    "growth demand supply valuation dividend buyback downgrade upgrade "
+    "beat missed record tariffs export regulators lawsuit".split()
+)
+
+
+def count_tokens(text: str) -> int:
     """
-    Call ChatGPT to get a buy/sell/hold recommendation.
+    Tokens in `text` for MODEL, via its tiktoken encoding; estimated at ~4
+    characters per token if tiktoken is missing or its encoding cannot be
+    loaded (it is downloaded on first use, so this happens offline).
+    """
+    global _encoding
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                try:
+                    import tiktoken
 
-    Raises:
-      - APIRecommendationError on OpenAI errors
-      - pydantic.ValidationError on malformed JSON
+                    _encoding = tiktoken.encoding_for_model(MODEL)
+                except Exception as e:
+                    _logger.warning(
+                        "No tiktoken encoding for %s, estimating tokens: %s", MODEL, e
+                    )
+                    _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def truncate_tokens(text: str, budget: int) -> str:
+    """The first `budget` tokens of `text` (by `count_tokens`' measure)."""
+    if count_tokens(text) <= budget:
+        return text
+    if _encoding:
+        return _encoding.decode(_encoding.encode(text)[:budget]).rstrip()
+    return text[: budget * 4].rstrip()
+
+
+def select_passages(title: str, text: str, budget: int = LLM_PROMPT_TOKENS) -> str:
+    """
+    Fit `text` into `budget` tokens. Short texts are returned unchanged;
+    otherwise keep the lede plus the sentences that share the most words
+    with the headline or mention financial terms and figures, in their
+    original order, with " ... " marking the gaps. If even the top-ranked
+    sentence is over budget (say, a long body with no sentence breaks), it
+    is cut to fit rather than dropped.
     """
+    if count_tokens(text) <= budget:
+        return text
+    sentences = [s.strip() for s in _SENTENCE_RE.split(text) if s.strip()]
+    headline = set(_WORD_RE.findall(title.lower()))
+
+    def informativeness(i: int, sentence: str) -> float:
+        words = _WORD_RE.findall(sentence.lower())
+        hits = sum(1 for w in words if w in headline or w in _FINANCE_TERMS)
+        hits += sum(1 for w in words if w[:1].isdigit())
+        # News leads with the key facts
+        lead = 3.0 if i == 0 else 1.0 / (1 + i)
+        return lead + hits / max(1, len(words)) ** 0.5
+
+    ranked = sorted(
+        range(len(sentences)),
+        key=lambda i: informativeness(i, sentences[i]),
+        reverse=True,
+    )
+    kept, used, cut = [], 0, False
+    for i in ranked:
+        cost = count_tokens(sentences[i]) + 1
+        if used + cost <= budget:
+            kept.append(i)
+            used += cost
+        elif not kept:
+            # Leave room for the "..." marking the cut
+            sentences[i] = truncate_tokens(sentences[i], budget - 2)
+            kept.append(i)
+            cut = True
+            break
+    kept.sort()
+
+    parts = []
+    for prev, i in zip([-1] + kept, kept):
+        if i != prev + 1:
+            parts.append("...")
+        parts.append(sentences[i])
+    if kept and (cut or kept[-1] != len(sentences) - 1):
+        parts.append("...")
+    return " ".join(parts)
+
+
+def count_prompt_tokens(messages: List[dict]) -> int:
+    """Tokens a chat request with `messages` is billed for (approximately)."""
+    # ~4 tokens of chat framing per message, plus the reply primer
+    return sum(count_tokens(m["content"]) + 4 for m in messages) + 3
+
+
+def build_messages(title: str, text: str, score: float) -> List[dict]:
+    """Chat messages asking for one article's recommendation."""
+    text = select_passages(title, text)
     intro = (
         "You are a financial analyst. Given an article headline, "
-        "its sentiment score (-1.0 to +1.0), and the full article text, "
+        "its sentiment score (-1.0 to +1.0), and the article text "
+        "(key passages only if it is long), "
         "choose one of [strong_sell, sell, hold, buy, strong_buy]"
     )
     fields = (
@@ -66,21 +219,608 @@ def recommend(title: str, text: str, score: float) -> ArticleRecc:
         f"Sentiment score: {score:.2f}\n"
         f"Text: {text}"
     )
+    return [
+        {"role": "system", "content": "You are an expert financial analyst."},
+        {"role": "user", "content": prompt},
+    ]
+
+
+# ---------- response cache ----------
+# Calls run at temperature 0, so a (model, messages) pair always gets the
+# same answer; cache it on disk under LLM_CACHE_DIR (LLM_CACHE_TTL seconds,
+# default 30 days; LLM_CACHE_MAX_MB). Unset LLM_CACHE_DIR disables it.
+LLM_CACHE_TTL = 30 * 24 * 3600
+
+
+def _cache_key(messages: List[dict], part: Optional[int] = None) -> str:
+    """
+    Key of the answer to `messages`, or of answer number `part` of a
+    packed request.
+    """
+    sent = [MODEL, 0.0, messages] + ([part] if part is not None else [])
+    raw = json.dumps(sent, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def get_cache_stats() -> Dict[str, int]:
+    """Recommendations served from the response cache vs. requested."""
+    with _stats_lock:
+        return dict(_cache_stats)
+
+
+def _cached(
+    messages: List[dict], use_cache: bool, part: Optional[int] = None
+) -> Optional[ArticleRecc]:
+    cache = cache_from_env("LLM_CACHE", LLM_CACHE_TTL) if use_cache else None
+    if cache is None:
+        return None
+    entry = cache.get(_cache_key(messages, part))
+    hit = entry is not None and cache.is_fresh(entry)
+    with _stats_lock:
+        _cache_stats["hits" if hit else "misses"] += 1
+    return ArticleRecc.model_validate(entry["payload"]) if hit else None
 
+
+def _store(
+    messages: List[dict], rec: ArticleRecc, use_cache: bool, part: Optional[int] = None
+) -> None:
+    cache = cache_from_env("LLM_CACHE", LLM_CACHE_TTL) if use_cache else None
+    if cache is not None:
+        cache.put(_cache_key(messages, part), rec.model_dump(mode="json"))
+
+
+def _parse(resp, messages: List[dict]) -> ArticleRecc:
+    raw = resp.choices[0].message.content
+    json_str = clean_json_response(raw)
+    # Let pydantic.ValidationError bubble up on invalid JSON
+    rec = ArticleRecc.model_validate_json(json_str)
+    # Prefer the API's own count; fall back to ours (e.g. stand-in clients)
+    usage = getattr(resp, "usage", None)
+    counted = getattr(usage, "prompt_tokens", None)
+    rec.prompt_tokens = counted if counted else count_prompt_tokens(messages)
+    return rec
+
+
+def recommend(
+    title: str, text: str, score: float, use_cache: bool = True
+) -> ArticleRecc:
+    """
+    Call ChatGPT to get a buy/sell/hold recommendation. Validated answers
+    are cached (see LLM_CACHE_DIR); `use_cache=False` bypasses the cache.
+
+    Raises:
+      - APIRecommendationError on OpenAI errors
+      - pydantic.ValidationError on malformed JSON
+    """
+    messages = build_messages(title, text, score)
+    rec = _cached(messages, use_cache)
+    if rec is not None:
+        return rec
+    _check_breaker()
     try:
-        resp = _client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are an expert financial analyst."},
-                {"role": "user", "content": prompt},
-            ],
+        start = time.monotonic()
+        resp = get_client().chat.completions.create(
+            model=MODEL,
+            messages=messages,
             temperature=0.0,
         )
     except OpenAIError as e:
+        _breaker.record_failure()
         _logger.error("OpenAI API error in recommend()", exc_info=True)
         raise APIRecommendationError("LLM request failed") from e
+    _breaker.record_success()
+    _latencies.record(time.monotonic() - start)
+    rec = _parse(resp, messages)
+    _store(messages, rec, use_cache)
+    return rec
 
-    raw = resp.choices[0].message.content
-    json_str = clean_json_response(raw)
-    # Let pydantic.ValidationError bubble up on invalid JSON
-    return ArticleRecc.model_validate_json(json_str)
+
+# ---------- tail latency ----------
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures so callers fail
+    fast instead of waiting on a failing API. After `cooldown` seconds it
+    lets a single probe through (half-open): success closes it, failure
+    opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, cooldown: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.failures = 0
+        self.trips = 0
+        self.fast_failed = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self._opened_at < self.cooldown:
+                    self.fast_failed += 1
+                    return False
+                self.state = "half_open"
+                return True
+            if self.state == "half_open":
+                # One probe at a time
+                self.fast_failed += 1
+                return False
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.trips += 1
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Recent call latencies, for the hedging delay."""
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self._samples = deque(maxlen=size)
+        self.min_samples = min_samples
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds before hedging a call, or None when hedging is off."""
+        if LLM_HEDGE_DELAY <= 0:
+            return None
+        p95 = self.p95()
+        return LLM_HEDGE_DELAY if p95 is None else p95
+
+
+_breaker = CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_COOLDOWN)
+_latencies = LatencyTracker()
+
+
+def _check_breaker() -> None:
+    if not _breaker.allow():
+        raise APIRecommendationError("LLM circuit breaker open")
+
+
+def get_metrics() -> Dict[str, object]:
+    """Circuit-breaker state, hedging counts and recent p95 latency."""
+    return {
+        "breaker_state": _breaker.state,
+        "breaker_trips": _breaker.trips,
+        "fast_failed": _breaker.fast_failed,
+        "hedged": _latencies.hedged,
+        "hedge_wins": _latencies.hedge_wins,
+        "p95_seconds": _latencies.p95(),
+    }
+
+
+async def _timed_call(client, messages: List[dict], timeout: float):
+    start = time.monotonic()
+    resp = await asyncio.wait_for(
+        client.chat.completions.create(model=MODEL, messages=messages, temperature=0.0),
+        timeout,
+    )
+    _latencies.record(time.monotonic() - start)
+    return resp
+
+
+async def _reserve_hedge(
+    messages: List[dict],
+    limiter,
+    slots: Optional[asyncio.Semaphore],
+) -> bool:
+    """
+    Take a concurrency slot and rate-limit allowance for a hedge without
+    waiting for either; False (taking nothing) if one is not free.
+    """
+    if slots is not None and slots.locked():
+        return False
+    if limiter is not None and not limiter.try_acquire(_estimate_tokens(messages)):
+        return False
+    if slots is not None:
+        await slots.acquire()  # free, so this does not block
+    return True
+
+
+async def _hedged_call(
+    client,
+    messages: List[dict],
+    limiter,
+    timeout: float,
+    slots: Optional[asyncio.Semaphore] = None,
+):
+    """
+    Send the request once `limiter` allows it and, if it is still running
+    after the hedge delay, a second identical one; return whichever
+    succeeds first and cancel the other. Raises the last error if both
+    fail. The hedge is skipped when the rate limits or `slots` (the
+    caller's concurrency limit) have no room for it right away.
+    """
+    if limiter is not None:
+        await limiter.acquire(_estimate_tokens(messages))
+    # The hedge clock starts once the request is actually sent
+    primary = asyncio.ensure_future(_timed_call(client, messages, timeout))
+    delay = _latencies.hedge_delay()
+    if delay is None:
+        return await primary
+    done, _ = await asyncio.wait({primary}, timeout=delay)
+    if done:
+        return primary.result()
+    if not await _reserve_hedge(messages, limiter, slots):
+        return await primary
+
+    _latencies.hedged += 1
+    backup = asyncio.ensure_future(_timed_call(client, messages, timeout))
+    pending = {primary, backup}
+    error: Optional[BaseException] = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    if task is backup:
+                        _latencies.hedge_wins += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+        if slots is not None:
+            slots.release()
+
+
+# ---------- concurrent recommendations ----------
+class TokenBucketLimiter:
+    """
+    Async limiter for requests/min and tokens/min. Each bucket holds a
+    minute's allowance and refills continuously; `acquire` waits until
+    both have room for the call.
+    """
+
+    def __init__(self, requests_per_min: float, tokens_per_min: float):
+        self.capacity = (float(requests_per_min), float(tokens_per_min))
+        self._available = list(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed, self._updated = now - self._updated, now
+        for i, cap in enumerate(self.capacity):
+            self._available[i] = min(cap, self._available[i] + elapsed * cap / 60)
+
+    async def acquire(self, tokens: int) -> None:
+        # A call larger than the whole budget waits for a full bucket
+        need = (1.0, min(float(tokens), self.capacity[1]))
+        async with self._lock:
+            while True:
+                self._refill()
+                wait = max(
+                    (n - a) * 60 / cap
+                    for n, a, cap in zip(need, self._available, self.capacity)
+                )
+                if wait <= 0:
+                    for i, n in enumerate(need):
+                        self._available[i] -= n
+                    return
+                await asyncio.sleep(wait)
+
+    def try_acquire(self, tokens: int) -> bool:
+        """`acquire` without waiting: False if there is no room right now."""
+        if self._lock.locked():
+            return False  # others are already waiting for the bucket
+        need = (1.0, min(float(tokens), self.capacity[1]))
+        self._refill()
+        if any(n > a for n, a in zip(need, self._available)):
+            return False
+        for i, n in enumerate(need):
+            self._available[i] -= n
+        return True
+
+
+def _estimate_tokens(messages: List[dict]) -> int:
+    """Prompt size plus the reply allowance."""
+    return count_prompt_tokens(messages) + LLM_RESPONSE_TOKENS
+
+
+def _new_async_client() -> AsyncOpenAI:
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise RuntimeError("Please set OPENAI_API_KEY in your environment")
+    return AsyncOpenAI(api_key=api_key)
+
+
+async def recommend_async(
+    client: AsyncOpenAI,
+    title: str,
+    text: str,
+    score: float,
+    limiter: Optional[TokenBucketLimiter] = None,
+    timeout: float = LLM_TIMEOUT,
+    use_cache: bool = True,
+    slots: Optional[asyncio.Semaphore] = None,
+) -> ArticleRecc:
+    """
+    Async `recommend` on `client`, waiting for `limiter` first and giving
+    up after `timeout` seconds. A call slower than the recent p95 is
+    hedged with a second request if `limiter` and `slots` (the caller's
+    concurrency semaphore) have room for it, and while the circuit
+    breaker is open calls fail fast. Raises the same errors; a timeout or
+    an open breaker is an APIRecommendationError. Cache hits skip all of
+    this.
+    """
+    messages = build_messages(title, text, score)
+    rec = _cached(messages, use_cache)
+    if rec is not None:
+        return rec
+    _check_breaker()
+    try:
+        resp = await _hedged_call(client, messages, limiter, timeout, slots)
+    except OpenAIError as e:
+        _breaker.record_failure()
+        _logger.error("OpenAI API error in recommend_async()", exc_info=True)
+        raise APIRecommendationError("LLM request failed") from e
+    except asyncio.TimeoutError as e:
+        _breaker.record_failure()
+        _logger.error("OpenAI API call timed out after %.0fs", timeout)
+        raise APIRecommendationError("LLM request timed out") from e
+    _breaker.record_success()
+    rec = _parse(resp, messages)
+    _store(messages, rec, use_cache)
+    return rec
+
+
+def recommend_many(
+    items: Sequence[Tuple[str, str, float]],
+    max_concurrency: int = LLM_CONCURRENCY,
+    requests_per_min: float = LLM_REQUESTS_PER_MIN,
+    tokens_per_min: float = LLM_TOKENS_PER_MIN,
+    timeout: float = LLM_TIMEOUT,
+    use_cache: bool = True,
+) -> List[Union[ArticleRecc, APIRecommendationError, ValidationError]]:
+    """
+    Recommend for many (title, text, score) items concurrently: at most
+    `max_concurrency` calls in flight, within the requests/min and
+    tokens/min limits, each bounded by `timeout`.
+
+    Returns one entry per item in input order: the ArticleRecc, or the
+    APIRecommendationError / ValidationError that item raised, so callers
+    can fall back per item instead of losing the whole batch.
+    `use_cache=False` bypasses the response cache.
+    """
+    if not items:
+        return []
+
+    def job(title, text, score):
+        async def run(client, limiter, slots):
+            try:
+                return await recommend_async(
+                    client, title, text, score, limiter, timeout, use_cache, slots
+                )
+            except (APIRecommendationError, ValidationError) as e:
+                return e
+
+        return run
+
+    return _run_concurrently(
+        [job(*item) for item in items],
+        max_concurrency,
+        requests_per_min,
+        tokens_per_min,
+    )
+
+
+def _run_concurrently(
+    jobs: Sequence[Callable],
+    max_concurrency: int,
+    requests_per_min: float,
+    tokens_per_min: float,
+) -> list:
+    """
+    Run `job(client, limiter, slots)` coroutines with at most
+    `max_concurrency` in flight, sharing one async client and rate limiter;
+    results in order. `slots` is the concurrency semaphore, which a job
+    holds one slot of and must acquire for any extra request it sends.
+    """
+
+    async def run():
+        semaphore = asyncio.Semaphore(max_concurrency)
+        limiter = TokenBucketLimiter(requests_per_min, tokens_per_min)
+
+        async def one(job):
+            async with semaphore:
+                return await job(client, limiter, semaphore)
+
+        # A fresh client per event loop; its connections are bound to it
+        client = _new_async_client()
+        try:
+            return await asyncio.gather(*(one(job) for job in jobs))
+        finally:
+            await client.close()
+
+    return asyncio.run(run())
+
+
+# ---------- packed requests ----------
+def _packed_messages(items: Sequence[Tuple[str, str, float]]) -> List[dict]:
+    intro = (
+        "You are a financial analyst. For each numbered article below you "
+        "get its headline, sentiment score (-1.0 to +1.0) and text (key "
+        "passages only if it is long); choose one of "
+        "[strong_sell, sell, hold, buy, strong_buy] for each."
+    )
+    fields = (
+        " Return exactly a JSON array with one object per article, with "
+        "fields: id, title, sentiment_score, recommendation, rationale."
+    )
+    articles = "\n\n".join(
+        f"[{i}]\nHeadline: {title}\nSentiment score: {score:.2f}\nText: {text}"
+        for i, (title, text, score) in enumerate(items)
+    )
+    return [
+        {"role": "system", "content": "You are an expert financial analyst."},
+        {"role": "user", "content": f"{intro}{fields}\n\n{articles}"},
+    ]
+
+
+def _parse_packed(resp, messages: List[dict], count: int) -> Dict[int, ArticleRecc]:
+    """
+    Valid recommendations from a packed reply, by article id; missing,
+    duplicate and malformed elements are left out.
+    """
+    try:
+        elements = json.loads(clean_json_response(resp.choices[0].message.content))
+    except ValueError:
+        return {}
+    if not isinstance(elements, list):
+        return {}
+
+    usage = getattr(resp, "usage", None)
+    total = getattr(usage, "prompt_tokens", None) or count_prompt_tokens(messages)
+    recs: Dict[int, ArticleRecc] = {}
+    for element in elements:
+        if not isinstance(element, dict):
+            continue
+        idx = element.pop("id", None)
+        if not isinstance(idx, int) or not 0 <= idx < count or idx in recs:
+            continue
+        try:
+            recs[idx] = ArticleRecc.model_validate(element)
+        except ValidationError:
+            continue
+        # Each article is charged an equal share of the shared prompt
+        recs[idx].prompt_tokens = round(total / count)
+    return recs
+
+
+def _packs(sizes: Sequence[int], max_items: int, budget: int) -> List[List[int]]:
+    """Consecutive groups of item indices within `max_items` and `budget`."""
+    packs: List[List[int]] = []
+    pack: List[int] = []
+    used = 0
+    for i, size in enumerate(sizes):
+        if pack and (len(pack) >= max_items or used + size > budget):
+            packs.append(pack)
+            pack, used = [], 0
+        pack.append(i)
+        used += size
+    if pack:
+        packs.append(pack)
+    return packs
+
+
+def recommend_packed(
+    items: Sequence[Tuple[str, str, float]],
+    max_items: int = LLM_PACK_SIZE,
+    budget: int = LLM_PACK_TOKENS,
+    use_cache: bool = True,
+    **kwargs,
+) -> List[Union[ArticleRecc, APIRecommendationError, ValidationError]]:
+    """
+    `recommend_many`, but with up to `max_items` articles (their texts
+    within `budget` tokens) packed into each request, so the instructions
+    are sent once per pack rather than once per article.
+
+    The model answers with a JSON array validated element by element.
+    Articles it leaves out or answers invalidly, and all articles of a pack
+    whose request fails, are retried one by one through `recommend_many`.
+    Cached single-article answers are reused. Packed answers are cached
+    under the packed prompt and the article's position in it, so they are
+    only reused for that same pack, never as a single-prompt answer. Extra
+    keyword arguments (concurrency, rate limits, timeout) go to both stages.
+    """
+    if not items:
+        return []
+    timeout = kwargs.get("timeout", LLM_TIMEOUT)
+    results: List[Optional[Union[ArticleRecc, Exception]]] = [None] * len(items)
+    todo, excerpts = [], []
+    for i, (title, text, score) in enumerate(items):
+        rec = _cached(build_messages(title, text, score), use_cache)
+        if rec is not None:
+            results[i] = rec
+        else:
+            todo.append(i)
+            excerpts.append((title, select_passages(title, text), score))
+
+    def job(pack: List[int], messages: List[dict]):
+        async def run(client, limiter, slots):
+            if not _breaker.allow():
+                return {}
+            await limiter.acquire(
+                count_prompt_tokens(messages) + LLM_RESPONSE_TOKENS * len(pack)
+            )
+            try:
+                resp = await asyncio.wait_for(
+                    client.chat.completions.create(
+                        model=MODEL, messages=messages, temperature=0.0
+                    ),
+                    timeout,
+                )
+            except (OpenAIError, asyncio.TimeoutError) as e:
+                _breaker.record_failure()
+                _logger.warning(
+                    "Packed request for %d articles failed: %s", len(pack), e
+                )
+                return {}
+            _breaker.record_success()
+            return _parse_packed(resp, messages, len(pack))
+
+        return run
+
+    sizes = [count_tokens(text) + 20 for _, text, _ in excerpts]
+    packs = []
+    for pack in _packs(sizes, max_items, budget):
+        messages = _packed_messages([excerpts[j] for j in pack])
+        recs = {pos: _cached(messages, use_cache, pos) for pos in range(len(pack))}
+        if all(rec is not None for rec in recs.values()):
+            for pos, j in enumerate(pack):
+                results[todo[j]] = recs[pos]
+        else:
+            packs.append((pack, messages))
+    answers = (
+        _run_concurrently(
+            [job(pack, messages) for pack, messages in packs],
+            kwargs.get("max_concurrency", LLM_CONCURRENCY),
+            kwargs.get("requests_per_min", LLM_REQUESTS_PER_MIN),
+            kwargs.get("tokens_per_min", LLM_TOKENS_PER_MIN),
+        )
+        if packs
+        else []
+    )
+    for (pack, messages), recs in zip(packs, answers):
+        for pos, j in enumerate(pack):
+            if pos in recs:
+                results[todo[j]] = recs[pos]
+                _store(messages, recs[pos], use_cache, pos)
+
+    retry = [i for i in range(len(items)) if results[i] is None]
+    if retry:
+        _logger.info("Retrying %d articles missing from packed replies", len(retry))
+        for i, rec in zip(
+            retry,
+            recommend_many([items[i] for i in retry], use_cache=use_cache, **kwargs),
+        ):
+            results[i] = rec
+    return results
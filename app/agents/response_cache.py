@@ -0,0 +1,144 @@
+# app/agents/response_cache.py
+"""
+Optional on-disk cache for JSON API responses.
+
+Entries are keyed by URL plus normalised query params (the API key is left
+out), expire after a TTL, and are evicted least-recently-used once the cache
+directory grows past `max_bytes`. Stale entries that carried an ETag or
+Last-Modified header can be revalidated with a conditional request instead
+of being downloaded again. Other callers (e.g. the LLM recommender) can
+store entries under keys of their own.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Params that identify the caller rather than the resource
+_IGNORED_PARAMS = frozenset({"api-key"})
+
+
+class ResponseCache:
+    """Directory of JSON entries, one file per request key."""
+
+    def __init__(self, directory: str, ttl: float = 3600, max_bytes: int = 100 << 20):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(url: str, params: Dict) -> str:
+        """Stable cache key for a GET of `url` with `params`."""
+        normalised = sorted(
+            (k, str(v)) for k, v in params.items() if k not in _IGNORED_PARAMS
+        )
+        raw = json.dumps([url, normalised], separators=(",", ":"))
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Return the stored entry (keys: payload, stored_at, etag,
+        last_modified) or None. Reading an entry marks it recently used.
+        """
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Dropping unreadable cache entry %s: %s", path, e)
+            self._remove(path)
+            return None
+        return entry
+
+    def is_fresh(self, entry: Dict) -> bool:
+        return time.time() - entry["stored_at"] < self.ttl
+
+    def put(
+        self,
+        key: str,
+        payload,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        """Store `payload` atomically, then evict down to `max_bytes`."""
+        entry = {
+            "payload": payload,
+            "stored_at": time.time(),
+            "etag": etag,
+            "last_modified": last_modified,
+        }
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, self._path(key))
+        self._evict()
+
+    def refresh(self, key: str, entry: Dict) -> None:
+        """Restart an entry's TTL after a 304 Not Modified."""
+        self.put(key, entry["payload"], entry.get("etag"), entry.get("last_modified"))
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _evict(self) -> None:
+        with self._lock:
+            files = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith(".json"):
+                    continue
+                st = entry.stat()
+                files.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+            files.sort()
+            for _, size, path in files:
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+
+_instances: Dict[str, ResponseCache] = {}
+_instances_lock = threading.Lock()
+
+
+def cache_from_env(prefix: str, default_ttl: float = 3600) -> Optional[ResponseCache]:
+    """
+    Process-wide cache configured from `{prefix}_DIR` (plus optional
+    `{prefix}_TTL` seconds and `{prefix}_MAX_MB`); None if the dir is unset.
+    """
+    directory = os.getenv(f"{prefix}_DIR")
+    if not directory:
+        return None
+    with _instances_lock:
+        cache = _instances.get(prefix)
+        if cache is None or cache.directory != directory:
+            cache = _instances[prefix] = ResponseCache(
+                directory,
+                ttl=float(os.getenv(f"{prefix}_TTL", str(default_ttl))),
+                max_bytes=int(float(os.getenv(f"{prefix}_MAX_MB", "100")) * 2**20),
+            )
+    return cache
+
+
+def get_default_cache() -> Optional[ResponseCache]:
+    """Guardian response cache, configured from GUARDIAN_CACHE_DIR etc."""
+    return cache_from_env("GUARDIAN_CACHE")
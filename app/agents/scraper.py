@@ -1,44 +1,101 @@
 import logging
-from datetime import datetime
-from typing import Dict, List
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
 import requests
 
+from app.agents import http_client
+from app.agents.http_client import RequestStats
+from app.agents.response_cache import ResponseCache, get_default_cache
+
 logger = logging.getLogger(__name__)
 GUARDIAN_URL = "https://content.guardianapis.com/search"
 
 
-def fetch_articles(query: str, api_key: str, page_size: int = 5) -> List[Dict]:
+class RateLimiter:
+    """
+    Thread-safe limiter that spaces calls to at most `per_second` per second.
+    A falsy `per_second` disables limiting.
     """
-    Fetches and parses Guardian articles matching `query`.
 
-    Returns a list of dicts with keys:
-      - webUrl: str
-      - webTitle: str
-      - bodyText: str
-      - publishDate: datetime.date
+    def __init__(self, per_second: Optional[float] = None):
+        self.interval = 1.0 / per_second if per_second else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
 
-    Filters out any entries missing required fields or malformed dates.
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _fetch_page(
+    params: Dict,
+    page: int,
+    limiter: RateLimiter,
+    stats: Optional[List[RequestStats]] = None,
+    cache: Optional[ResponseCache] = None,
+) -> Tuple[List[Dict], int]:
     """
-    params = {
-        "api-key": api_key,
-        "q": query,
-        "show-fields": "bodyText",
-        "page-size": page_size,
-        "order-by": "newest",
-    }
-    try:
-        r = requests.get(GUARDIAN_URL, params=params, timeout=5)
+    Fetch one Guardian result page through the shared HTTP session.
+
+    With a `cache`, a fresh entry is served without any request, and a stale
+    one is revalidated with If-None-Match / If-Modified-Since when the API
+    sent validators.
+    Returns (raw results, total page count); raises on HTTP or JSON errors.
+    """
+    page_params = {**params, "page": page}
+    key = entry = None
+    headers = {}
+    if cache:
+        key = cache.key(GUARDIAN_URL, page_params)
+        entry = cache.get(key)
+        if entry and cache.is_fresh(entry):
+            return _page_contents(entry["payload"])
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    limiter.wait()
+    r, call_stats = http_client.get(
+        GUARDIAN_URL, params=page_params, timeout=5, headers=headers or None
+    )
+    if stats is not None:
+        stats.append(call_stats)
+    if entry and r.status_code == 304:
+        cache.refresh(key, entry)
+        payload = entry["payload"]
+    else:
         r.raise_for_status()
         payload = r.json()
-        results = payload.get("response", {}).get("results", [])
-    except requests.RequestException as e:
-        logger.error("Guardian API request failed: %s", e)
-        return []
-    except ValueError as e:
-        logger.error("Failed to parse JSON from Guardian: %s", e)
-        return []
+        if cache:
+            cache.put(
+                key,
+                payload,
+                etag=r.headers.get("ETag"),
+                last_modified=r.headers.get("Last-Modified"),
+            )
+    return _page_contents(payload)
 
+
+def _page_contents(payload: Dict) -> Tuple[List[Dict], int]:
+    """Pull (raw results, total page count) out of a Guardian payload."""
+    response = payload.get("response", {})
+    return response.get("results", []), int(response.get("pages") or 1)
+
+
+def _parse_results(results: List[Dict]) -> List[Dict]:
+    """Validate raw Guardian results and normalise them into article dicts."""
     articles: List[Dict] = []
     for art in results:
         url = art.get("webUrl")
@@ -54,7 +111,7 @@ def fetch_articles(query: str, api_key: str, page_size: int = 5) -> List[Dict]:
         # Parse ISO date with trailing Z support
         try:
             dt_str = iso_dt.rstrip("Z") + "+00:00" if iso_dt.endswith("Z") else iso_dt
-            pub_date = datetime.fromisoformat(dt_str).date()
+            published_at = datetime.fromisoformat(dt_str)
         except Exception as e:
             logger.warning(
                 "Invalid publication date '%s' for URL %s: %s", iso_dt, url, e
@@ -66,8 +123,175 @@ def fetch_articles(query: str, api_key: str, page_size: int = 5) -> List[Dict]:
                 "webUrl": url,
                 "webTitle": title,
                 "bodyText": body,
-                "publishDate": pub_date,
+                "publishDate": published_at.date(),
+                "publishedAt": published_at,
             }
         )
 
     return articles
+
+
+def iter_articles(
+    query: str,
+    api_key: str,
+    page_size: int = 5,
+    max_pages: int = 1,
+    max_workers: int = 4,
+    requests_per_second: Optional[float] = None,
+    from_date: Optional[date] = None,
+    order_by: str = "newest",
+    stats: Optional[List[RequestStats]] = None,
+    cache: Optional[ResponseCache] = None,
+    failed_pages: Optional[List[int]] = None,
+    already_seen: Optional[Callable[[Dict], bool]] = None,
+    limiter: Optional[RateLimiter] = None,
+) -> Iterator[Dict]:
+    """
+    Lazily yields validated Guardian articles matching `query`, page by page.
+
+    The first page is fetched on its own to learn `response.pages`; pages
+    2..`max_pages` are then fetched concurrently on a pool of `max_workers`
+    threads, throttled to `requests_per_second` (unlimited if None) or by
+    a `limiter` shared with other walks on the same API key. At most
+    `max_workers` pages are in flight ahead of the consumer, so memory stays
+    flat however many pages a backfill walks. Pages are yielded in page
+    order, so results keep the API's publication order, and de-duplicated
+    by URL.
+
+    `from_date` is passed to the Guardian `from-date` filter so incremental
+    runs only page through content published on or after that day; pair it
+    with `order_by="oldest"` to walk forward from a saved high-water mark.
+
+    Requests go through the pooled, retrying `http_client`; pass a list as
+    `stats` to collect one `RequestStats` (latency, retries) per page call.
+    `cache` serves repeat page requests from disk (see `ResponseCache`); it
+    defaults to the one configured by GUARDIAN_CACHE_DIR, if any.
+
+    A page that cannot be fetched or parsed is logged and skipped. Pass a
+    list as `failed_pages` to learn which: each failed page number is
+    appended when the stream reaches that page, before any article of a
+    later page is yielded, so callers can tell a complete walk from one
+    with gaps.
+
+    `already_seen` marks articles the caller has handled before; they are
+    not yielded, and a page made up only of them does not count against
+    `max_pages`, so a walk resumed from a high-water mark keeps paging
+    until it reaches something new (or runs out of pages).
+
+    Yields dicts with keys:
+      - webUrl: str
+      - webTitle: str
+      - bodyText: str
+      - publishDate: datetime.date
+      - publishedAt: datetime.datetime (the full webPublicationDate)
+
+    Skips any entries missing required fields or malformed dates.
+    """
+    params = {
+        "api-key": api_key,
+        "q": query,
+        "show-fields": "bodyText",
+        "page-size": page_size,
+        "order-by": order_by,
+    }
+    if from_date:
+        params["from-date"] = from_date.isoformat()
+    limiter = limiter or RateLimiter(requests_per_second)
+    cache = cache or get_default_cache()
+    failed_pages = failed_pages if failed_pages is not None else []
+    try:
+        results, total_pages = _fetch_page(params, 1, limiter, stats, cache)
+    except requests.RequestException as e:
+        logger.error("Guardian API request failed: %s", e)
+        failed_pages.append(1)
+        return
+    except ValueError as e:
+        logger.error("Failed to parse JSON from Guardian: %s", e)
+        failed_pages.append(1)
+        return
+
+    def fetch_rest(page: int) -> Optional[List[Dict]]:
+        """The page's results, or None if it failed."""
+        try:
+            return _fetch_page(params, page, limiter, stats, cache)[0]
+        except requests.RequestException as e:
+            logger.error("Guardian API request failed for page %d: %s", page, e)
+        except ValueError as e:
+            logger.error("Failed to parse JSON from Guardian page %d: %s", page, e)
+        return None
+
+    # Articles can shift between pages while we fetch; keep the first copy
+    seen = set()
+
+    def fresh(page_results: List[Dict]) -> List[Dict]:
+        articles = []
+        for art in _parse_results(page_results):
+            if art["webUrl"] not in seen:
+                seen.add(art["webUrl"])
+                articles.append(art)
+        return articles
+
+    # Pages holding only already-seen articles move the last page out by one
+    last_page = max_pages
+
+    def unseen(articles: List[Dict]) -> List[Dict]:
+        nonlocal last_page
+        if not already_seen:
+            return articles
+        new = [art for art in articles if not already_seen(art)]
+        if articles and not new:
+            last_page += 1
+        return new
+
+    yield from unseen(fresh(results))
+
+    next_page = 2
+
+    def pages(n: int) -> Iterator[int]:
+        """Up to `n` more page numbers, as far as the walk currently reaches."""
+        nonlocal next_page
+        for _ in range(n):
+            if next_page > min(total_pages, last_page):
+                return
+            next_page += 1
+            yield next_page - 1
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        in_flight = deque(
+            (page, executor.submit(fetch_rest, page)) for page in pages(max_workers)
+        )
+        while in_flight:
+            page, future = in_flight.popleft()
+            page_results = future.result()
+            if page_results is None:
+                failed_pages.append(page)
+                articles = []
+            else:
+                articles = unseen(fresh(page_results))
+            for later in pages(max_workers - len(in_flight)):
+                in_flight.append((later, executor.submit(fetch_rest, later)))
+            yield from articles
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def fetch_articles(
+    query: str, api_key: str, page_size: int = 5, **kwargs
+) -> List[Dict]:
+    """
+    Fetches and parses Guardian articles matching `query` into a list.
+
+    Accepts the same options as `iter_articles` (`max_pages`, `max_workers`,
+    `requests_per_second`, `from_date`, `order_by`, `stats`, `cache`).
+
+    Returns a list of dicts with keys:
+      - webUrl: str
+      - webTitle: str
+      - bodyText: str
+      - publishDate: datetime.date
+      - publishedAt: datetime.datetime (the full webPublicationDate)
+
+    Filters out any entries missing required fields or malformed dates.
+    """
+    return list(iter_articles(query, api_key, page_size=page_size, **kwargs))
@@ -1,10 +1,472 @@
-from typing import Tuple
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 
-from transformers import pipeline
+from app.agents.db_writer import get_cached_sentiments, store_cached_sentiments
 
-_hf = pipeline("sentiment-analysis", truncation=True, max_length=512)
+MODEL_ID = os.getenv(
+    "SENTIMENT_MODEL", "distilbert/distilbert-base-uncased-finetuned-sst-2-english"
+)
+# Inference backend: "torch" (HF default) or "onnx" (ONNX Runtime via optimum,
+# optionally dynamically int8-quantized with SENTIMENT_QUANTIZE=1)
+BACKENDS = ("torch", "onnx")
+BACKEND = os.getenv("SENTIMENT_BACKEND", "torch")
+QUANTIZE = os.getenv("SENTIMENT_QUANTIZE", "0") == "1"
+ONNX_DIR = os.getenv("SENTIMENT_ONNX_DIR", os.path.join(".cache", "onnx"))
+# Intra-op threads per model instance (0 = library default, all cores) and
+# worker processes for SentimentPool (0 = one per core)
+THREADS = int(os.getenv("SENTIMENT_THREADS", "0"))
+WORKERS = int(os.getenv("SENTIMENT_WORKERS", "0"))
+# Padded tokens per forward pass; batches of short texts grow up to this
+MAX_BATCH_TOKENS = int(os.getenv("SENTIMENT_MAX_BATCH_TOKENS", "8192"))
+# Longest input fed to the model; tokenizers without a configured limit
+# report a huge model_max_length
+MAX_INPUT_TOKENS = 512
 
+_hf = None
+_hf_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
 
-def analyze_sentiment(text: str) -> Tuple[str, float]:
-    out = _hf(text[:1000])[0]
-    return out["label"], out["score"]
+
+def backend_id() -> str:
+    """Name of the active backend, e.g. "torch", "onnx" or "onnx-int8"."""
+    if BACKEND == "onnx":
+        return "onnx-int8" if QUANTIZE else "onnx"
+    return BACKEND
+
+
+def _load_onnx_model():
+    """
+    Export MODEL_ID to ONNX (and dynamically quantize it to int8 if
+    QUANTIZE) on first use, caching the files under ONNX_DIR, then load it
+    into ONNX Runtime.
+    """
+    try:
+        from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    except ImportError as e:
+        raise RuntimeError(
+            "SENTIMENT_BACKEND=onnx needs `pip install optimum[onnxruntime]`"
+        ) from e
+
+    options = {}
+    if THREADS:
+        import onnxruntime
+
+        options["session_options"] = onnxruntime.SessionOptions()
+        options["session_options"].intra_op_num_threads = THREADS
+
+    export_dir = os.path.join(ONNX_DIR, MODEL_ID.replace("/", "--"))
+    if not os.path.exists(os.path.join(export_dir, "model.onnx")):
+        model = ORTModelForSequenceClassification.from_pretrained(MODEL_ID, export=True)
+        model.save_pretrained(export_dir)
+    if not QUANTIZE:
+        return ORTModelForSequenceClassification.from_pretrained(export_dir, **options)
+
+    quantized = "model_quantized.onnx"
+    if not os.path.exists(os.path.join(export_dir, quantized)):
+        quantizer = ORTQuantizer.from_pretrained(export_dir, file_name="model.onnx")
+        qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+        quantizer.quantize(save_dir=export_dir, quantization_config=qconfig)
+    return ORTModelForSequenceClassification.from_pretrained(
+        export_dir, file_name=quantized, **options
+    )
+
+
+def get_pipeline():
+    """
+    Return the shared HF sentiment pipeline, loading it on first use.
+    Importing this module stays cheap; the model loads once per process.
+    """
+    global _hf
+    if _hf is None:
+        with _hf_lock:
+            if _hf is None:
+                if BACKEND not in BACKENDS:
+                    raise ValueError(
+                        f"Unknown SENTIMENT_BACKEND {BACKEND!r}; use one of {BACKENDS}"
+                    )
+                from transformers import AutoTokenizer, pipeline
+
+                if THREADS and BACKEND == "torch":
+                    import torch
+
+                    torch.set_num_threads(THREADS)
+                model = _load_onnx_model() if BACKEND == "onnx" else MODEL_ID
+                _hf = pipeline(
+                    "sentiment-analysis",
+                    model=model,
+                    tokenizer=AutoTokenizer.from_pretrained(MODEL_ID),
+                    truncation=True,
+                    max_length=512,
+                )
+    return _hf
+
+
+def warm_up() -> None:
+    """Load the model ahead of the first request (for long-lived workers)."""
+    get_pipeline()
+
+
+# ---------- result cache ----------
+def text_hash(text: str) -> str:
+    """Hash of the whitespace-normalised text, the sentiment cache key."""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def get_cache_stats() -> Dict[str, int]:
+    """Texts served from the sentiment cache (hits) vs. scored (misses)."""
+    with _stats_lock:
+        return dict(_cache_stats)
+
+
+def _with_cache(
+    texts: Sequence[str],
+    session,
+    variant: str,
+    score: Callable[[List[str]], List[Tuple[str, float]]],
+) -> List[Tuple[str, float]]:
+    """
+    Serve `texts` from the sentiment cache where possible and run `score`
+    only on the rest (each distinct text once), storing the new results.
+    Without a `session` the cache is bypassed.
+    """
+    if session is None:
+        return score(list(texts))
+    model_key = f"{MODEL_ID}:{variant}"
+    if BACKEND != "torch":
+        model_key = f"{MODEL_ID}@{backend_id()}:{variant}"
+    hashes = [text_hash(t) for t in texts]
+    found = get_cached_sentiments(session, model_key, set(hashes))
+    todo: Dict[str, str] = {}
+    for h, text in zip(hashes, texts):
+        if h not in found:
+            todo.setdefault(h, text)
+    misses = sum(1 for h in hashes if h not in found)
+    with _stats_lock:
+        _cache_stats["hits"] += len(hashes) - misses
+        _cache_stats["misses"] += misses
+    if todo:
+        fresh = dict(zip(todo, score(list(todo.values()))))
+        store_cached_sentiments(session, model_key, fresh)
+        found.update(fresh)
+    return [found[h] for h in hashes]
+
+
+def _score_heads(texts: List[str], batch_size: int) -> List[Tuple[str, float]]:
+    hf = get_pipeline()
+    tokenizer = hf.tokenizer
+    input_ids = tokenizer(
+        [text[:1000] for text in texts],
+        truncation=True,
+        max_length=min(MAX_INPUT_TOKENS, tokenizer.model_max_length),
+    )["input_ids"]
+    id2label = hf.model.config.id2label
+    results = []
+    for probs in _predict_ids(input_ids, batch_size):
+        idx = max(range(len(probs)), key=probs.__getitem__)
+        results.append((id2label[idx], float(probs[idx])))
+    return results
+
+
+def analyze_sentiment(text: str, session=None) -> Tuple[str, float]:
+    """
+    Score the first 1,000 characters of `text`. With a `session`, results
+    are cached by model and text hash, so unchanged bodies skip the model.
+    """
+    return _with_cache([text], session, "head", lambda ts: _score_heads(ts, 1))[0]
+
+
+def analyze_sentiment_batch(
+    texts: Sequence[str], batch_size: int = 16, session=None
+) -> List[Tuple[str, float]]:
+    """
+    Score many texts at once, running up to `batch_size` inputs of similar
+    length per forward pass (see `_predict_ids`). Results match
+    `analyze_sentiment` (including its `session` cache) and come back in
+    input order.
+    """
+    if not texts:
+        return []
+    return _with_cache(texts, session, "head", lambda ts: _score_heads(ts, batch_size))
+
+
+# ---------- full-document scoring ----------
+AGGREGATIONS = ("mean", "max")
+# Defaults of analyze_documents_batch, also used by SentimentPool
+DOC_OVERLAP = 64
+DOC_MAX_WINDOWS = 8
+DOC_AGGREGATE = "mean"
+
+
+def _doc_variant(aggregate: str, max_windows: int, overlap: int) -> str:
+    """Sentiment-cache variant of full-document scores with these settings."""
+    return f"doc:{aggregate}:{max_windows}:{overlap}"
+
+
+def _window_size(tokenizer) -> int:
+    """Content tokens per window, leaving room for the special tokens."""
+    max_length = min(MAX_INPUT_TOKENS, tokenizer.model_max_length)
+    return max_length - tokenizer.num_special_tokens_to_add()
+
+
+def _windows(
+    ids: List[int], size: int, overlap: int, max_windows: int
+) -> List[List[int]]:
+    """
+    Split token ids into windows of at most `size` tokens that overlap by
+    `overlap`, the last one ending on the final token. When there are more
+    than `max_windows`, keep an evenly spaced subset so the whole document
+    is still sampled.
+    """
+    if len(ids) <= size:
+        return [ids]
+    stride = max(1, size - overlap)
+    starts = list(range(0, len(ids) - size + 1, stride))
+    if starts[-1] + size < len(ids):
+        starts.append(len(ids) - size)
+    if len(starts) > max_windows:
+        step = (len(starts) - 1) / max(1, max_windows - 1)
+        starts = [starts[round(i * step)] for i in range(max_windows)]
+    return [ids[s : s + size] for s in starts]
+
+
+def _aggregate(
+    probs: List[List[float]], weights: List[int], method: str
+) -> Tuple[int, float]:
+    """
+    Combine per-window class probabilities into (class index, score).
+    "mean" is the length-weighted mean; "max" keeps the single most
+    confident window.
+    """
+    if method == "max":
+        combined = max(probs, key=max)
+    elif method == "mean":
+        total = sum(weights) or 1
+        combined = [
+            sum(p[c] * w for p, w in zip(probs, weights)) / total
+            for c in range(len(probs[0]))
+        ]
+    else:
+        raise ValueError(f"Unknown aggregation {method!r}; use one of {AGGREGATIONS}")
+    idx = max(range(len(combined)), key=combined.__getitem__)
+    return idx, float(combined[idx])
+
+
+def _token_batches(
+    lengths: Sequence[int], max_tokens: int, max_batch: int
+) -> List[List[int]]:
+    """
+    Group input indices into batches of similar length: sort by length,
+    then fill each batch while its padded size (count x longest) stays
+    within `max_tokens` and its count within `max_batch`. Short inputs thus
+    share large batches and long ones never pad the short ones.
+    """
+    batches: List[List[int]] = []
+    batch: List[int] = []
+    for i in sorted(range(len(lengths)), key=lengths.__getitem__):
+        # Ascending order, so input i sets the padded width of its batch
+        if batch and (
+            len(batch) >= max_batch or (len(batch) + 1) * lengths[i] > max_tokens
+        ):
+            batches.append(batch)
+            batch = []
+        batch.append(i)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _predict_ids(input_ids: List[List[int]], batch_size: int) -> List[List[float]]:
+    """
+    Run the model on tokenized inputs (special tokens included) and return
+    their class probabilities in input order. Inputs are length-bucketed
+    into batches of at most `batch_size` and MAX_BATCH_TOKENS padded tokens,
+    so little compute goes to padding.
+    """
+    hf = get_pipeline()
+    probs: List[List[float]] = [[] for _ in input_ids]
+    lengths = [len(ids) for ids in input_ids]
+    for batch in _token_batches(lengths, MAX_BATCH_TOKENS, batch_size):
+        chunk = [input_ids[i] for i in batch]
+        for i, p in zip(batch, _forward(hf.tokenizer, hf.model, chunk)):
+            probs[i] = p
+    return probs
+
+
+def _forward(tokenizer, model, input_ids: List[List[int]]) -> List[List[float]]:
+    """One padded forward pass on the active backend; softmaxed logits."""
+    if BACKEND == "onnx":
+        import numpy as np
+
+        enc = tokenizer.pad({"input_ids": input_ids}, return_tensors="np")
+        logits = np.asarray(model(**enc).logits, dtype=np.float64)
+        exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+        return (exp / exp.sum(axis=-1, keepdims=True)).tolist()
+
+    import torch
+
+    enc = tokenizer.pad({"input_ids": input_ids}, return_tensors="pt").to(model.device)
+    with torch.no_grad():
+        logits = model(**enc).logits
+    return logits.softmax(-1).tolist()
+
+
+def analyze_documents_batch(
+    texts: Sequence[str],
+    batch_size: int = 16,
+    overlap: int = DOC_OVERLAP,
+    max_windows: int = DOC_MAX_WINDOWS,
+    aggregate: str = DOC_AGGREGATE,
+    session=None,
+) -> List[Tuple[str, float]]:
+    """
+    Score whole documents rather than their first 1,000 characters.
+
+    Each body is tokenized once and split into overlapping model-length
+    windows (at most `max_windows` per document, which bounds the cost).
+    All windows of all documents are scored together in batches of
+    `batch_size`, then each document's window scores are combined with
+    `aggregate` ("mean" or "max") into the usual (label, score).
+    """
+    if aggregate not in AGGREGATIONS:
+        raise ValueError(
+            f"Unknown aggregation {aggregate!r}; use one of {AGGREGATIONS}"
+        )
+    if not texts:
+        return []
+    return _with_cache(
+        texts,
+        session,
+        _doc_variant(aggregate, max_windows, overlap),
+        lambda ts: _score_documents(ts, batch_size, overlap, max_windows, aggregate),
+    )
+
+
+def _score_documents(
+    texts: List[str], batch_size: int, overlap: int, max_windows: int, aggregate: str
+) -> List[Tuple[str, float]]:
+    hf = get_pipeline()
+    tokenizer = hf.tokenizer
+    size = _window_size(tokenizer)
+
+    spans, flat = [], []
+    for text in texts:
+        ids = tokenizer(text, add_special_tokens=False, verbose=False)["input_ids"]
+        windows = _windows(ids, size, overlap, max_windows)
+        spans.append((len(flat), len(windows)))
+        flat.extend(windows)
+
+    probs = _predict_ids(
+        [tokenizer.build_inputs_with_special_tokens(w) for w in flat], batch_size
+    )
+    id2label = hf.model.config.id2label
+    results = []
+    for start, count in spans:
+        weights = [max(1, len(w)) for w in flat[start : start + count]]
+        idx, score = _aggregate(probs[start : start + count], weights, aggregate)
+        results.append((id2label[idx], score))
+    return results
+
+
+def analyze_document(text: str, **kwargs) -> Tuple[str, float]:
+    """Full-document `analyze_sentiment`; see `analyze_documents_batch`."""
+    return analyze_documents_batch([text], **kwargs)[0]
+
+
+# ---------- multi-process scoring ----------
+def _init_worker(threads: int) -> None:
+    """Pool initializer: load the model once per worker process."""
+    global THREADS
+    # Each worker already owns a core; tokenizer threads would oversubscribe
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    THREADS = threads
+    warm_up()
+
+
+def _score_chunk(
+    texts: List[str], batch_size: int, full_document: bool
+) -> List[Tuple[str, float]]:
+    if full_document:
+        return analyze_documents_batch(texts, batch_size=batch_size)
+    return _score_heads(texts, batch_size)
+
+
+class SentimentPool:
+    """
+    Score sentiment across several worker processes, each holding its own
+    copy of the model (loaded once by the pool initializer) and running
+    `threads` intra-op threads. Texts go out in chunks of `chunk_size` and
+    results come back in input order, so a large backfill uses every core
+    instead of one interpreter contending on the GIL.
+
+        with SentimentPool(workers=4, threads=2) as pool:
+            results = pool.score(texts, session=session)
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        threads: Optional[int] = None,
+        chunk_size: int = 64,
+    ):
+        workers = workers or WORKERS or os.cpu_count() or 1
+        threads = threads or THREADS or max(1, (os.cpu_count() or 1) // workers)
+        self.chunk_size = chunk_size
+        # Forking a process that has already loaded torch can deadlock
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(threads,),
+        )
+
+    def score(
+        self,
+        texts: Sequence[str],
+        batch_size: int = 16,
+        full_document: bool = False,
+        session=None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Parallel `analyze_sentiment_batch` (or `analyze_documents_batch`
+        with default settings if `full_document`), sharing its cache: only
+        texts missing from it are sent to the workers.
+        """
+        if not texts:
+            return []
+
+        def run(todo: List[str]) -> List[Tuple[str, float]]:
+            chunks = [
+                todo[i : i + self.chunk_size]
+                for i in range(0, len(todo), self.chunk_size)
+            ]
+            results: List[Tuple[str, float]] = []
+            for chunk in self._executor.map(
+                _score_chunk,
+                chunks,
+                repeat(batch_size, len(chunks)),
+                repeat(full_document, len(chunks)),
+            ):
+                results.extend(chunk)
+            return results
+
+        if full_document:
+            variant = _doc_variant(DOC_AGGREGATE, DOC_MAX_WINDOWS, DOC_OVERLAP)
+        else:
+            variant = "head"
+        return _with_cache(texts, session, variant, run)
+
+    def close(self) -> None:
+        self._executor.shutdown()
+
+    def __enter__(self) -> "SentimentPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -6,21 +6,46 @@ from dotenv import load_dotenv
 
 load_dotenv()  # loads GUARDIAN_API_KEY & OPENAI_API_KEY
 
+import argparse
 import logging
 import os
-from datetime import date
-from typing import Dict, List
+import queue
+import threading
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union
 
 from psycopg2 import DatabaseError
-from pydantic import ValidationError
 from requests import HTTPError
-from sqlalchemy import Date, cast, select
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
-from app.agents.db_writer import Analysis, get_session, insert_analysis, upsert_article
-from app.agents.llm_recommender import APIRecommendationError, recommend
-from app.agents.scraper import fetch_articles
-from app.agents.sentiment import analyze_sentiment
+from app.agents.db_writer import (
+    Analysis,
+    Article,
+    ArticleTicker,
+    ScrapeCursor,
+    get_scrape_cursor,
+    get_session,
+    init_db,
+    insert_analyses,
+    insert_analysis,
+    link_article_tickers,
+    prune_sentiment_cache,
+    upsert_articles,
+    upsert_scrape_cursor,
+)
+from app.agents.llm_recommender import ArticleRecc
+from app.agents.llm_recommender import get_cache_stats as get_llm_cache_stats
+from app.agents.llm_recommender import get_metrics as get_llm_metrics
+from app.agents.llm_recommender import recommend_many, recommend_packed
+from app.agents.scraper import RateLimiter, iter_articles
+from app.agents.sentiment import (
+    SentimentPool,
+    analyze_documents_batch,
+    analyze_sentiment_batch,
+    get_cache_stats,
+)
 
 # Logging setup
 logging.basicConfig(
@@ -29,103 +54,624 @@ logging.basicConfig(
 )
 logger = logging.getLogger("app.orchestrator")
 
+# Guardian query -> ticker symbol its articles are linked to
+TICKERS = {"nvidia": "NVDA"}
+# Longest symbol article_tickers can hold
+TICKER_MAX_LENGTH = ArticleTicker.ticker.type.length
+# Guardian calls per second across all queries of a run (0 = unlimited)
+GUARDIAN_REQUESTS_PER_SECOND = float(os.getenv("GUARDIAN_REQUESTS_PER_SECOND", "0"))
+# Sentiment cache rows unused for this long are pruned after each run
+SENTIMENT_CACHE_MAX_AGE = timedelta(
+    days=int(os.getenv("SENTIMENT_CACHE_MAX_AGE_DAYS", "90"))
+)
+
+
+def _as_utc(dt):
+    """SQLite hands back naive timestamps; treat them as UTC."""
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+
+def _store_articles(
+    session: Session,
+    batch: List[Tuple[str, Dict]],
+    article_ids: Dict[str, Optional[int]],
+    tickers: Dict[str, str],
+    today: date,
+) -> List[Tuple[Dict, int]]:
+    """
+    Bulk-upsert the not yet seen articles of a batch of (query, article)
+    pairs, recording their ids in `article_ids` (None if the upsert
+    failed), and link every article to the ticker of each query it
+    matched (queries missing from `tickers` are not linked). Returns the
+    new (article, article_id) pairs that still need analyzing today.
+    """
+    new: Dict[str, Dict] = {}
+    for _, art in batch:
+        if art["webUrl"] not in article_ids:
+            new.setdefault(art["webUrl"], art)
+    if new:
+        try:
+            ids = upsert_articles(
+                session,
+                [
+                    {
+                        "url": url,
+                        "title": art["webTitle"],
+                        "body_text": art["bodyText"],
+                        "publish_date": art["publishDate"],
+                    }
+                    for url, art in new.items()
+                ],
+            )
+        except SQLAlchemyError as e:
+            logger.error("upsert_articles failed for %d articles: %s", len(new), e)
+            session.rollback()
+            ids = {}
+        for url in new:
+            article_ids[url] = ids.get(url)
+
+    links = [
+        (article_ids[art["webUrl"]], tickers[query])
+        for query, art in batch
+        if query in tickers and article_ids[art["webUrl"]] is not None
+    ]
+    try:
+        link_article_tickers(session, links)
+    except SQLAlchemyError as e:
+        logger.error("link_article_tickers failed for %d links: %s", len(links), e)
+        session.rollback()
+    stored = [article_ids[url] for url in new if article_ids[url] is not None]
+    todo = _not_analyzed_today(session, stored, today)
+    return [
+        (art, article_ids[url]) for url, art in new.items() if article_ids[url] in todo
+    ]
+
+
+def _not_analyzed_today(
+    session: Session, article_ids: Sequence[int], today: date
+) -> Set[int]:
+    """
+    The subset of `article_ids` with no analysis dated `today`, in one
+    anti-join. The day is a half-open timestamp range rather than a cast,
+    so the lookup can use the (article_id, analysis_date) index.
+    """
+    if not article_ids:
+        return set()
+    start = datetime.combine(today, time.min)
+    stmt = select(Article.article_id).where(
+        Article.article_id.in_(article_ids),
+        ~select(Analysis.analysis_id)
+        .where(
+            Analysis.article_id == Article.article_id,
+            Analysis.analysis_date >= start,
+            Analysis.analysis_date < start + timedelta(days=1),
+        )
+        .exists(),
+    )
+    return set(session.scalars(stmt))
+
+
+class _Walk:
+    """
+    How far one query's scrape may move its high-water mark: to the newest
+    article of the unbroken run of stored articles the walk yielded before
+    any page failed. Articles after a gap would otherwise fall behind the
+    mark and never be fetched again.
+    """
+
+    def __init__(self, newest_first: bool):
+        self.newest_first = newest_first
+        self.failed_pages: List[int] = []
+        self.broken = False
+        self.newest: Optional[Dict] = None
+        self._clean: Set[str] = set()  # URLs yielded before any failed page
 
-def orchestrate_nvidia(batch_size: int = 50) -> None:
+    def track(self, articles: Iterator[Dict]) -> Iterator[Dict]:
+        for art in articles:
+            if not self.failed_pages:
+                self._clean.add(art["webUrl"])
+            yield art
+
+    def stored(self, art: Dict, ok: bool) -> None:
+        """Record, in walk order, whether `art` was stored."""
+        if self.broken:
+            return
+        if not ok or art["webUrl"] not in self._clean:
+            self.broken = True
+        elif self.newest is None or art["publishedAt"] > self.newest["publishedAt"]:
+            self.newest = art
+
+    def mark(self) -> Optional[Dict]:
+        """The article to move the cursor to, or None to leave it alone."""
+        # Walking newest first, any gap lies behind the newest article
+        if self.newest_first and (self.broken or self.failed_pages):
+            return None
+        return self.newest
+
+
+def _scrape_query(
+    session: Session,
+    query: str,
+    guardian_key: str,
+    batch_size: int,
+    max_pages: int,
+    full_rescan: bool,
+    limiter: RateLimiter,
+) -> Tuple[Optional[ScrapeCursor], _Walk, Iterator[Dict]]:
+    """
+    Return the saved cursor for `query`, the `_Walk` tracking its scrape
+    and a lazy stream of its articles published since that high-water mark
+    (or the newest ones if `full_rescan` or none saved), throttled by the
+    run's shared `limiter`.
+    """
+    cursor = None if full_rescan else get_scrape_cursor(session, query)
+    walk = _Walk(newest_first=not cursor)
+    if not cursor:
+        articles = iter_articles(
+            query,
+            guardian_key,
+            page_size=batch_size,
+            max_pages=max_pages,
+            failed_pages=walk.failed_pages,
+            limiter=limiter,
+        )
+        return None, walk, walk.track(articles)
+
+    # Walk forward from the high-water mark so nothing is skipped
+    # when more than `batch_size` articles arrived since last run.
+    # Pages holding only articles at or before the mark don't count
+    # against `max_pages`, so a busy day cannot stall the walk there.
+    since = _as_utc(cursor.last_published_at)
+    last_url = cursor.last_url
+    articles = iter_articles(
+        query,
+        guardian_key,
+        page_size=batch_size,
+        max_pages=max_pages,
+        from_date=since.date(),
+        order_by="oldest",
+        failed_pages=walk.failed_pages,
+        limiter=limiter,
+        already_seen=lambda art: art["publishedAt"] < since
+        or (art["publishedAt"] == since and art["webUrl"] == last_url),
+    )
+    return cursor, walk, walk.track(articles)
+
+
+def _advance_cursors(
+    session: Session,
+    cursors: Dict[str, Optional[ScrapeCursor]],
+    walks: Dict[str, _Walk],
+) -> None:
+    """Move each query's high-water mark as far as its walk allows."""
+    for query, walk in walks.items():
+        art, cursor = walk.mark(), cursors[query]
+        if walk.failed_pages or walk.broken:
+            logger.warning(
+                "Scrape of %r was incomplete (failed pages: %s); %s",
+                query,
+                walk.failed_pages or "none",
+                (
+                    "keeping its high-water mark"
+                    if art is None
+                    else f"advancing its high-water mark only to {art['webUrl']}"
+                ),
+            )
+        if art is None:
+            continue
+        if not cursor or art["publishedAt"] > _as_utc(cursor.last_published_at):
+            upsert_scrape_cursor(session, query, art["publishedAt"], art["webUrl"])
+
+
+def _merge_streams(
+    streams: Dict[str, Iterator[Dict]], max_buffered: int
+) -> Iterator[Tuple[str, Dict]]:
+    """
+    Drain each query's article stream on its own thread and yield
+    (query, article) pairs as they arrive, buffering at most `max_buffered`.
+    """
+    done = object()
+    buffer: queue.Queue = queue.Queue(maxsize=max_buffered)
+
+    def pump(query: str, articles: Iterator[Dict]) -> None:
+        try:
+            for art in articles:
+                buffer.put((query, art))
+        except HTTPError as e:
+            logger.error("Scraper failed for %r: %s", query, e)
+        finally:
+            buffer.put((query, done))
+
+    for query, articles in streams.items():
+        threading.Thread(target=pump, args=(query, articles), daemon=True).start()
+
+    remaining = len(streams)
+    while remaining:
+        query, art = buffer.get()
+        if art is done:
+            remaining -= 1
+        else:
+            yield query, art
+
+
+def _score_sentiments(
+    session: Session,
+    items: List[Tuple[Dict, int]],
+    batch_size: int,
+    full_document: bool = False,
+    pool: Optional[SentimentPool] = None,
+):
+    """
+    Score the bodies of `items` in batched pipeline calls, over the whole
+    body if `full_document`, reusing cached results for unchanged text.
+    With a `pool` the batch is spread over its worker processes.
+    If the batch fails, fall back to scoring one by one so a single bad
+    input only costs its own result.
     """
-    1) Scrape up to `batch_size` NVIDIA articles.
-    2) Skip ones already analyzed today.
-    3) Analyze & save every new article:
-       - sentiment analysis
+    score_batch = analyze_documents_batch if full_document else analyze_sentiment_batch
+    try:
+        bodies = [art["bodyText"] for art, _ in items]
+        if pool is not None:
+            return pool.score(bodies, batch_size, full_document, session=session)
+        return score_batch(bodies, batch_size=batch_size, session=session)
+    except Exception as e:
+        logger.warning("Batched sentiment analysis failed: %s", e)
+        session.rollback()
+
+    scores = []
+    for art, _ in items:
+        try:
+            scores.append(score_batch([art["bodyText"]], session=session)[0])
+        except Exception as e:
+            logger.warning("Sentiment analysis failed for %r: %s", art["webTitle"], e)
+            session.rollback()
+            scores.append(("NEUTRAL", 0.0))
+    return scores
+
+
+def _analyze_batch(
+    session: Session,
+    items: List[Tuple[Dict, int]],
+    sentiment_batch_size: int,
+    full_document: bool = False,
+    pool: Optional[SentimentPool] = None,
+    llm_cache: bool = True,
+    llm_pack_size: int = 0,
+) -> int:
+    """
+    Batch-score sentiment for `items`, fetch their LLM recommendations
+    concurrently, then save them all in one bulk insert.
+    """
+    if not items:
+        return 0
+    scores = _score_sentiments(
+        session, items, sentiment_batch_size, full_document, pool
+    )
+    requests = [
+        (art["webTitle"], art["bodyText"], score)
+        for (art, _), (_, score) in zip(items, scores)
+    ]
+    if llm_pack_size > 1:
+        recs = recommend_packed(requests, llm_pack_size, use_cache=llm_cache)
+    else:
+        recs = recommend_many(requests, use_cache=llm_cache)
+    rows = [
+        _analysis_row(art, article_id, label, score, rec)
+        for (art, article_id), (label, score), rec in zip(items, scores, recs)
+    ]
+    saved = len(rows)
+    try:
+        insert_analyses(session, rows)
+    except (SQLAlchemyError, DatabaseError) as e:
+        # (the raw COPY cursor raises psycopg2's DatabaseError unwrapped)
+        # Retry row by row so one bad record does not drop the whole batch
+        logger.warning("insert_analyses failed, saving one at a time: %s", e)
+        session.rollback()
+        for row in rows:
+            try:
+                insert_analysis(session, **row)
+            except SQLAlchemyError as e:
+                logger.error(
+                    "insert_analysis failed for article_id %d: %s",
+                    row["article_id"],
+                    e,
+                )
+                session.rollback()
+                saved -= 1
+    logger.info("Saved %d analyses", saved)
+    return len(items)
+
+
+def _analysis_row(
+    art: Dict,
+    article_id: int,
+    label: str,
+    score: float,
+    rec: Union[ArticleRecc, Exception],
+) -> Dict:
+    """
+    The analysis record of one scored article. `rec` is its recommendation,
+    or the error that request raised, in which case we fall back to hold.
+    """
+    prompt_tokens = None
+    if isinstance(rec, ArticleRecc):
+        rec_data = rec.model_dump(mode="json")
+        prompt_tokens = rec.prompt_tokens
+    else:
+        logger.warning("LLM recommendation failed for %r: %s", art["webTitle"], rec)
+        rec_data = {
+            "sentiment_score": score,
+            "recommendation": "hold",
+            "rationale": "fallback due to error",
+        }
+    return {
+        "article_id": article_id,
+        "sentiment_label": label,
+        "sentiment_score": score,
+        "recommendation": rec_data["recommendation"],
+        "rationale": rec_data["rationale"],
+        "prompt_tokens": prompt_tokens,
+    }
+
+
+def _query_tickers(queries: Sequence[str], tickers: Dict[str, str]) -> Dict[str, str]:
+    """
+    The ticker symbol of each query in `queries` that has a usable one.
+    Queries without a symbol, or with one too long for article_tickers,
+    are logged and left out, so their articles are analyzed but not linked.
+    """
+    symbols = {}
+    for query in queries:
+        symbol = tickers.get(query)
+        if not symbol:
+            logger.warning(
+                "No ticker for query %r; its articles won't be linked", query
+            )
+        elif len(symbol) > TICKER_MAX_LENGTH:
+            logger.warning(
+                "Ticker %r for query %r is longer than %d characters; skipping it",
+                symbol,
+                query,
+                TICKER_MAX_LENGTH,
+            )
+        else:
+            symbols[query] = symbol
+    return symbols
+
+
+def orchestrate(
+    queries: Sequence[str],
+    batch_size: int = 50,
+    full_rescan: bool = False,
+    max_pages: int = 1,
+    stream: bool = False,
+    tickers: Optional[Dict[str, str]] = None,
+    sentiment_batch_size: int = 16,
+    full_document: bool = False,
+    sentiment_workers: int = 0,
+    llm_cache: bool = True,
+    llm_pack_size: int = 0,
+    requests_per_second: float = GUARDIAN_REQUESTS_PER_SECOND,
+) -> None:
+    """
+    1) Scrape up to `max_pages` pages of `batch_size` articles for every
+       query concurrently, each from its own saved high-water mark (or the
+       newest ones if `full_rescan` or none saved).
+    2) De-duplicate by URL across queries, link each article to the ticker
+       of every query it matched, and skip ones already analyzed today.
+    3) Analyze & save every new article once:
+       - sentiment analysis, batched `sentiment_batch_size` at a time and
+         over the whole body (sliding windows) if `full_document`
        - LLM recommendation
-       - insert_analysis
+       - insert_analyses (one bulk insert per analyzed batch)
+
+    `tickers` maps a query to its ticker symbol (default: `TICKERS`);
+    articles of a query without a usable symbol are analyzed but not
+    linked to any ticker (see `_query_tickers`). With `stream=True` new articles are
+    analyzed every `sentiment_batch_size` arrivals instead of after the last
+    page, so analysis overlaps with fetching the remaining pages and the
+    scraped batch is never held in memory. `sentiment_workers` > 0 scores
+    sentiment in that many worker processes (see `SentimentPool`), for
+    large backfills on multi-core machines. `llm_cache=False` asks the LLM
+    again even for prompts it has already answered. `llm_pack_size` > 1
+    packs that many articles into each LLM request (see `recommend_packed`).
+    `requests_per_second` caps Guardian calls across all queries together,
+    since they share one API key (default: GUARDIAN_REQUESTS_PER_SECOND;
+    0 for no limit).
+
+    A query's high-water mark only moves once its articles are analyzed,
+    and never past a page that failed or an article that was not stored
+    (see `_Walk`), so those are fetched again next run.
     """
     guardian_key = os.getenv("GUARDIAN_API_KEY")
     if not guardian_key:
         logger.error("Missing GUARDIAN_API_KEY")
         return
 
+    init_db()
     session: Session = get_session()
     today = date.today()
+    tickers = _query_tickers(queries, tickers or TICKERS)
+    # Worker processes only start (and load the model) on the first batch
+    pool = SentimentPool(workers=sentiment_workers) if sentiment_workers else None
 
     # 1) Scrape articles
-    try:
-        raw = fetch_articles("nvidia", guardian_key, page_size=batch_size)
-        logger.info("Scraped %d articles", len(raw))
-    except HTTPError as e:
-        logger.error("Scraper failed: %s", e)
-        return
+    limiter = RateLimiter(requests_per_second)
+    cursors, walks, streams = {}, {}, {}
+    for query in queries:
+        cursors[query], walks[query], streams[query] = _scrape_query(
+            session, query, guardian_key, batch_size, max_pages, full_rescan, limiter
+        )
 
-    # 2) Identify new articles
-    new_items = []
-    for art in raw:
-        try:
-            art_obj = upsert_article(
-                session,
-                url=art["webUrl"],
-                title=art["webTitle"],
-                body=art["bodyText"],
-                publish_date=art["publishDate"],
-            )
-        except DatabaseError as e:
-            logger.error("upsert_article failed for %s: %s", art["webUrl"], e)
-            continue
+    scraped = processed = 0
+    article_ids: Dict[str, Optional[int]] = {}
 
-        seen = session.execute(
-            select(Analysis).where(
-                Analysis.article_id == art_obj.article_id,
-                cast(Analysis.analysis_date, Date) == today,
-            )
-        ).first()
-        if seen:
+    def store(batch: List[Tuple[str, Dict]]) -> List[Tuple[Dict, int]]:
+        new = _store_articles(session, batch, article_ids, tickers, today)
+        for query, art in batch:
+            walks[query].stored(art, article_ids[art["webUrl"]] is not None)
+        return new
+
+    pending, batch = [], []
+    # Streaming stores (and then analyzes) smaller batches as they arrive
+    store_every = sentiment_batch_size if stream else batch_size
+    for query, art in _merge_streams(streams, max_buffered=batch_size):
+        scraped += 1
+
+        # 2) Store each URL once; later matches only add a ticker link
+        batch.append((query, art))
+        if len(batch) < store_every:
             continue
+        pending += store(batch)
+        batch = []
 
-        new_items.append((art, art_obj))
+        # 3) Analyze each full batch straight away when streaming
+        if stream and len(pending) >= sentiment_batch_size:
+            processed += _analyze_batch(
+                session,
+                pending,
+                sentiment_batch_size,
+                full_document,
+                pool,
+                llm_cache,
+                llm_pack_size,
+            )
+            pending = []
+    pending += store(batch)
+    logger.info(
+        "Scraped %d articles (%d unique) for %d queries",
+        scraped,
+        len(article_ids),
+        len(queries),
+    )
 
-    if not new_items:
+    if not pending and not processed:
         logger.info("No new articles to analyze today.")
+        _advance_cursors(session, cursors, walks)
+        if pool is not None:
+            pool.close()
+        session.close()
         return
 
-    # 3) Process each new article
-    for art, art_obj in new_items:
-        title, body = art["webTitle"], art["bodyText"]
+    # 3) Process the remaining new articles
+    processed += _analyze_batch(
+        session,
+        pending,
+        sentiment_batch_size,
+        full_document,
+        pool,
+        llm_cache,
+        llm_pack_size,
+    )
+    if pool is not None:
+        pool.close()
+    _advance_cursors(session, cursors, walks)
 
-        # Sentiment analysis
-        try:
-            label, score = analyze_sentiment(body)
-        except Exception as e:
-            logger.warning("Sentiment analysis failed for %r: %s", title, e)
-            label, score = "NEUTRAL", 0.0
+    logger.info("Pipeline complete: processed %d new articles", processed)
+    logger.info("Sentiment cache: %s", get_cache_stats())
+    logger.info("LLM response cache: %s", get_llm_cache_stats())
+    logger.info("LLM calls: %s", get_llm_metrics())
+    pruned = prune_sentiment_cache(session, max_age=SENTIMENT_CACHE_MAX_AGE)
+    if pruned:
+        logger.info("Pruned %d stale sentiment cache rows", pruned)
+    session.close()
+
+
+def orchestrate_nvidia(
+    batch_size: int = 50,
+    full_rescan: bool = False,
+    max_pages: int = 1,
+    stream: bool = False,
+) -> None:
+    """Run the pipeline for the single `"nvidia"` query."""
+    orchestrate(
+        ["nvidia"],
+        batch_size=batch_size,
+        full_rescan=full_rescan,
+        max_pages=max_pages,
+        stream=stream,
+    )
 
-        # LLM recommendation
-        try:
-            rec = recommend(title, body, score)
-            rec_data = rec.model_dump(mode="json")
-        except (APIRecommendationError, ValidationError) as e:
-            logger.warning("LLM recommendation failed for %r: %s", title, e)
-            rec_data = {
-                "sentiment_score": score,
-                "recommendation": "hold",
-                "rationale": "fallback due to error",
-            }
-
-        # Insert analysis record
-        try:
-            insert_analysis(
-                session,
-                article_id=art_obj.article_id,
-                sentiment_label=label,
-                sentiment_score=score,
-                recommendation=rec_data["recommendation"],
-                rationale=rec_data["rationale"],
-            )
-            logger.info("Saved analysis for %r", title)
-        except DatabaseError as e:
-            logger.error(
-                "insert_analysis failed for article_id %d: %s", art_obj.article_id, e
-            )
 
-    logger.info("Pipeline complete: processed %d new articles", len(new_items))
+def _ticker_option(value: str) -> Tuple[str, str]:
+    """Parse a `--ticker QUERY=SYMBOL` option into (query, symbol)."""
+    query, sep, symbol = value.partition("=")
+    if not sep or not query or not symbol:
+        raise argparse.ArgumentTypeError(f"expected QUERY=SYMBOL, got {value!r}")
+    if len(symbol) > TICKER_MAX_LENGTH:
+        raise argparse.ArgumentTypeError(
+            f"ticker {symbol!r} is longer than {TICKER_MAX_LENGTH} characters"
+        )
+    return query, symbol
 
 
 if __name__ == "__main__":
-    orchestrate_nvidia()
+    parser = argparse.ArgumentParser(description="Run the news pipeline.")
+    parser.add_argument(
+        "queries", nargs="*", default=["nvidia"], help="Guardian search queries"
+    )
+    parser.add_argument(
+        "--ticker",
+        type=_ticker_option,
+        action="append",
+        default=[],
+        metavar="QUERY=SYMBOL",
+        help="link a query's articles to this ticker (repeatable; "
+        "nvidia=NVDA is built in)",
+    )
+    parser.add_argument(
+        "--full-rescan",
+        action="store_true",
+        help="ignore the saved high-water mark and fetch the newest articles",
+    )
+    parser.add_argument(
+        "--max-pages", type=int, default=1, help="Guardian result pages to walk"
+    )
+    parser.add_argument(
+        "--requests-per-second",
+        type=float,
+        default=GUARDIAN_REQUESTS_PER_SECOND,
+        help="cap Guardian API calls across all queries (0 = unlimited; "
+        "default: GUARDIAN_REQUESTS_PER_SECOND)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="analyze articles as each page arrives instead of after scraping",
+    )
+    parser.add_argument(
+        "--full-document",
+        action="store_true",
+        help="score sentiment over the whole body instead of its first 1,000 chars",
+    )
+    parser.add_argument(
+        "--sentiment-workers",
+        type=int,
+        default=int(os.getenv("SENTIMENT_WORKERS", "0")),
+        help="score sentiment in this many worker processes (0 = in-process)",
+    )
+    parser.add_argument(
+        "--no-llm-cache",
+        action="store_true",
+        help="bypass the LLM response cache (see LLM_CACHE_DIR)",
+    )
+    parser.add_argument(
+        "--pack-llm",
+        type=int,
+        default=0,
+        metavar="N",
+        help="pack up to N articles into each LLM request",
+    )
+    args = parser.parse_args()
+    orchestrate(
+        args.queries,
+        tickers={**TICKERS, **dict(args.ticker)},
+        full_rescan=args.full_rescan,
+        max_pages=args.max_pages,
+        requests_per_second=args.requests_per_second,
+        stream=args.stream,
+        full_document=args.full_document,
+        sentiment_workers=args.sentiment_workers,
+        llm_cache=not args.no_llm_cache,
+        llm_pack_size=args.pack_llm,
+    )
@@ -1,10 +1,12 @@
 # app/web/__init__.py
 from flask import Flask
 
+from app.web import db
 from app.web.routes import bp  # ← use absolute import, not relative
 
 
 def create_app() -> Flask:
     app = Flask(__name__)
     app.register_blueprint(bp)
+    db.init_app(app)
     return app
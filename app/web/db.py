@@ -0,0 +1,33 @@
+# app/web/db.py
+import click
+from flask import Flask, g
+
+from app.agents import db_writer
+
+
+def get_db():
+    """
+    The database session of the current request, opened on first use and
+    closed when the app context tears down.
+    """
+    if "db" not in g:
+        g.db = db_writer.get_session()
+    return g.db
+
+
+def close_db(exc=None) -> None:
+    session = g.pop("db", None)
+    if session is not None:
+        session.close()
+
+
+@click.command("init-db")
+def init_db_command():
+    """Create any missing tables and indexes in DATABASE_URL."""
+    db_writer.init_db()
+    click.echo("Initialized the database.")
+
+
+def init_app(app: Flask) -> None:
+    app.teardown_appcontext(close_db)
+    app.cli.add_command(init_db_command)
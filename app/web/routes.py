@@ -1,13 +1,7 @@
-import numpy as np
-import pandas as pd
 from flask import Blueprint, abort, render_template
-from scipy.stats import linregress
-from sklearn.linear_model import LinearRegression, LogisticRegression
-from sklearn.metrics import accuracy_score, confusion_matrix, r2_score
-from sklearn.tree import DecisionTreeClassifier
 
-from app.agents.db_writer import Analysis, Article, get_session
-from scripts.ml_sentiment_stock_return import main
+from app.agents.db_writer import Analysis, Article
+from app.web.db import get_db
 
 bp = Blueprint("web", __name__)
 
@@ -20,7 +14,7 @@ def index():
 # ---------- browse ----------
 @bp.route("/browse")
 def browse():
-    session = get_session()
+    session = get_db()
     rows = (
         session.query(
             Article.publish_date,
@@ -39,7 +33,7 @@ def browse():
 # ---------- single-article ----------
 @bp.route("/article/<int:aid>")
 def article(aid):
-    session = get_session()
+    session = get_db()
     art = session.query(Article).get(aid) or abort(404)
     return render_template("article.html", art=art)
 
@@ -47,7 +41,18 @@ def article(aid):
 # ---------- analyze ----------
 @bp.route("/analyze")
 def analyze():
-    results = main()
+    # The ML stack is only needed here; importing it lazily keeps app
+    # start-up (and every other route) free of its multi-second load time.
+    import numpy as np
+    import pandas as pd
+    from scipy.stats import linregress
+    from sklearn.linear_model import LinearRegression, LogisticRegression
+    from sklearn.metrics import accuracy_score, confusion_matrix, r2_score
+    from sklearn.tree import DecisionTreeClassifier
+
+    from scripts.ml_sentiment_stock_return import main
+
+    results = main(get_db())
     df = results["df"]
 
     df["date"] = pd.to_datetime(df["date"])
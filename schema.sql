@@ -34,7 +34,39 @@ ALTER TABLE analysis
   ADD COLUMN price_date DATE
     REFERENCES stock_prices(price_date);
 
--- 5) Indexes for performance
+-- 5) Per-query scrape high-water marks
+CREATE TABLE scrape_cursors (
+  query              TEXT        PRIMARY KEY,
+  last_published_at  TIMESTAMPTZ NOT NULL,
+  last_url           TEXT,
+  updated_at         TIMESTAMPTZ DEFAULT NOW() NOT NULL
+);
+
+-- 6) Tickers each article was scraped for
+CREATE TABLE article_tickers (
+  article_id  INTEGER     REFERENCES articles(article_id) ON DELETE CASCADE,
+  ticker      VARCHAR(16) NOT NULL,
+  PRIMARY KEY (article_id, ticker)
+);
+
+-- 7) Sentiment results keyed by model and normalised text hash
+CREATE TABLE sentiment_cache (
+  model_id         VARCHAR(255) NOT NULL,
+  text_hash        VARCHAR(64)  NOT NULL,
+  sentiment_label  VARCHAR(32)  NOT NULL,
+  sentiment_score  REAL         NOT NULL,
+  created_at       TIMESTAMPTZ  DEFAULT NOW() NOT NULL,
+  last_used_at     TIMESTAMPTZ  DEFAULT NOW() NOT NULL,
+  PRIMARY KEY (model_id, text_hash)
+);
+
+-- 8) Prompt size of the LLM call behind each recommendation
+ALTER TABLE analysis
+  ADD COLUMN prompt_tokens INTEGER;
+
+-- 9) Indexes for performance
 CREATE INDEX idx_articles_publish_date ON articles(publish_date);
-CREATE INDEX idx_analysis_article   ON analysis(article_id);
+CREATE INDEX idx_analysis_article_date ON analysis(article_id, analysis_date);
 CREATE INDEX idx_analysis_price_date ON analysis(price_date);
+CREATE INDEX idx_article_tickers_ticker ON article_tickers(ticker);
+CREATE INDEX idx_sentiment_cache_last_used ON sentiment_cache(last_used_at);
@@ -0,0 +1,73 @@
+# scripts/backfill_recommendations.py
+"""
+Backfill LLM recommendations for every stored article that has never been
+analyzed, through the OpenAI Batch API (see app.agents.llm_batch).
+
+    python scripts/backfill_recommendations.py --workdir .cache/backfill --limit 5000
+
+Re-run with the same --workdir to resume a submitted batch. Use a local
+stand-in instead of the real API with scripts/fake_openai.py and
+OPENAI_BASE_URL=http://127.0.0.1:8766/v1.
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+from dotenv import load_dotenv
+
+# Ensure project root on path to import app modules
+top = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, top)
+load_dotenv(os.path.join(top, ".env"))
+
+from app.agents.db_writer import get_session, get_unanalyzed_articles  # noqa: E402
+from app.agents.llm_batch import BatchState, run_backfill  # noqa: E402
+from app.agents.llm_recommender import get_client  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill recommendations.")
+    parser.add_argument("--workdir", default=os.path.join(".cache", "backfill"))
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--sentiment-batch-size", type=int, default=16)
+    parser.add_argument("--poll-interval", type=float, default=60.0)
+    parser.add_argument("--timeout", type=float, default=None, help="seconds")
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s"
+    )
+
+    session = get_session()
+    articles = []
+    if not BatchState(args.workdir)["items"]:
+        from app.agents.sentiment import analyze_sentiment_batch
+
+        rows = get_unanalyzed_articles(session, limit=args.limit)
+        scores = analyze_sentiment_batch(
+            [a.body_text for a in rows],
+            batch_size=args.sentiment_batch_size,
+            session=session,
+        )
+        articles = [
+            (a.article_id, a.title, a.body_text, label, score)
+            for a, (label, score) in zip(rows, scores)
+        ]
+        print(f"Submitting {len(articles)} unanalyzed articles")
+    else:
+        print(f"Resuming backfill in {args.workdir}")
+
+    counts = run_backfill(
+        session,
+        get_client(),
+        args.workdir,
+        articles,
+        poll_interval=args.poll_interval,
+        timeout=args.timeout,
+    )
+    print(f"Ingested {counts['ingested']} analyses, {counts['failed']} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# scripts/bench_batching.py
+"""
+Compare fixed-size batching with length-bucketed, token-budgeted batching
+for sentiment inference on a realistic spread of article lengths.
+
+Texts are tokenized once up front, so only the forward passes are timed.
+Reports forward passes, padded tokens, the share of compute spent on
+padding and texts/sec for each strategy:
+
+    python scripts/bench_batching.py --texts 500 --batch-size 16
+    python scripts/bench_batching.py --full-document
+    python scripts/bench_batching.py --dry-run    # padding stats only, no model
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+top = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, top)
+
+from app.agents import sentiment  # noqa: E402
+from app.agents.sentiment import _token_batches  # noqa: E402
+
+_WORDS = (
+    "nvidia shares chip demand investors quarter revenue guidance export data "
+    "centre market analysts growth slowdown record supply rally profit"
+).split()
+
+
+def make_bodies(n: int, seed: int = 7):
+    """
+    Article bodies with a Guardian-like length mix: mostly 300-1,500 word
+    stories plus a tail of short briefs and long reads.
+    """
+    rng = random.Random(seed)
+    bodies = []
+    for _ in range(n):
+        words = min(6000, max(5, int(rng.lognormvariate(6.2, 1.0))))
+        bodies.append(" ".join(rng.choice(_WORDS) for _ in range(words)))
+    return bodies
+
+
+def fixed_batches(lengths, batch_size: int):
+    """Batches of `batch_size` consecutive inputs, as the pipeline made them."""
+    idx = list(range(len(lengths)))
+    return [idx[i : i + batch_size] for i in range(0, len(idx), batch_size)]
+
+
+def padding_stats(lengths, batches):
+    padded = sum(len(b) * max(lengths[i] for i in b) for b in batches)
+    return padded, 1 - sum(lengths) / padded if padded else 0.0
+
+
+def tokenize(bodies, full_document: bool):
+    """Model inputs (with special tokens) as the sentiment module builds them."""
+    tokenizer = sentiment.get_pipeline().tokenizer
+    if not full_document:
+        return tokenizer(
+            [b[:1000] for b in bodies],
+            truncation=True,
+            max_length=min(sentiment.MAX_INPUT_TOKENS, tokenizer.model_max_length),
+        )["input_ids"]
+    size = sentiment._window_size(tokenizer)
+    inputs = []
+    for body in bodies:
+        ids = tokenizer(body, add_special_tokens=False, verbose=False)["input_ids"]
+        inputs.extend(
+            tokenizer.build_inputs_with_special_tokens(w)
+            for w in sentiment._windows(
+                ids, size, sentiment.DOC_OVERLAP, sentiment.DOC_MAX_WINDOWS
+            )
+        )
+    return inputs
+
+
+def approx_lengths(bodies, full_document: bool):
+    """Word-count proxy for token lengths when no tokenizer is available."""
+    # Assumes two special tokens ([CLS] ... [SEP]) per input
+    limit = sentiment.MAX_INPUT_TOKENS
+    size = limit - 2
+    lengths = []
+    for body in bodies:
+        words = len(body.split()) * 13 // 10
+        if not full_document:
+            lengths.append(min(limit, len(body[:1000].split()) * 13 // 10 + 2))
+            continue
+        windows = 1
+        while words > size and windows < sentiment.DOC_MAX_WINDOWS:
+            lengths.append(limit)
+            words -= size - sentiment.DOC_OVERLAP
+            windows += 1
+        lengths.append(min(words, size) + 2)
+    return lengths
+
+
+def run(inputs, batches) -> float:
+    hf = sentiment.get_pipeline()
+    start = time.perf_counter()
+    for batch in batches:
+        sentiment._forward(hf.tokenizer, hf.model, [inputs[i] for i in batch])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sentiment batching.")
+    parser.add_argument("--texts", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--max-tokens", type=int, default=sentiment.MAX_BATCH_TOKENS)
+    parser.add_argument("--full-document", action="store_true")
+    parser.add_argument("--dry-run", action="store_true", help="skip the model")
+    args = parser.parse_args()
+
+    bodies = make_bodies(args.texts)
+    if args.dry_run:
+        inputs, lengths = None, approx_lengths(bodies, args.full_document)
+    else:
+        sentiment.warm_up()
+        inputs = tokenize(bodies, args.full_document)
+        lengths = [len(ids) for ids in inputs]
+
+    strategies = [
+        ("fixed", fixed_batches(lengths, args.batch_size)),
+        ("bucketed", _token_batches(lengths, args.max_tokens, args.batch_size)),
+    ]
+    print(
+        f"{len(bodies)} bodies -> {len(lengths)} inputs, "
+        f"{min(lengths)}-{max(lengths)} tokens (mean {sum(lengths) / len(lengths):.0f})"
+    )
+    header = f"{'batching':<10}{'passes':>8}{'padded tok':>12}{'padding %':>11}"
+    if inputs is not None:
+        header += f"{'seconds':>10}{'texts/s':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, batches in strategies:
+        padded, waste = padding_stats(lengths, batches)
+        line = f"{name:<10}{len(batches):>8}{padded:>12}{100 * waste:>11.1f}"
+        if inputs is not None:
+            seconds = run(inputs, batches)
+            line += f"{seconds:>10.2f}{len(bodies) / seconds:>10.1f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
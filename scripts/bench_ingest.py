@@ -0,0 +1,124 @@
+# scripts/bench_ingest.py
+"""
+Compare analysis ingestion rates: one insert_analysis() (and commit) per
+row against the bulk insert_analyses() writer (COPY on PostgreSQL,
+executemany elsewhere) at a few commit intervals.
+
+Runs against DATABASE_URL, or a throwaway SQLite file with --sqlite. The
+benchmark adds its own articles and deletes them (and their analyses)
+afterwards:
+
+    python scripts/bench_ingest.py --rows 20000
+    python scripts/bench_ingest.py --sqlite --rows 5000 --commit-every 500 5000
+"""
+
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+from dotenv import load_dotenv
+
+top = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, top)
+load_dotenv(os.path.join(top, ".env"))
+
+from sqlalchemy import delete  # noqa: E402
+
+from app.agents.db_writer import (  # noqa: E402
+    Article,
+    get_session,
+    init_db,
+    insert_analyses,
+    insert_analysis,
+    upsert_articles,
+)
+
+_URL_PREFIX = "bench-ingest://"
+
+
+def make_rows(article_ids, n: int):
+    """`n` analysis records spread over `article_ids`."""
+    for i in range(n):
+        yield {
+            "article_id": article_ids[i % len(article_ids)],
+            "sentiment_label": "POSITIVE" if i % 2 else "NEGATIVE",
+            "sentiment_score": (i % 100) / 100,
+            "recommendation": ("buy", "sell", "hold")[i % 3],
+            "rationale": f"Benchmark rationale {i}\twith a tab and a \\ slash.",
+            "prompt_tokens": 300 + i % 500,
+        }
+
+
+def timed(label: str, n: int, fn) -> None:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {n:>7} rows  {elapsed:8.2f}s  {n / elapsed:10.0f} rows/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark analysis ingestion.")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--articles", type=int, default=100)
+    parser.add_argument(
+        "--commit-every", type=int, nargs="+", default=[1000, 5000, 20000]
+    )
+    parser.add_argument(
+        "--single-rows",
+        type=int,
+        default=None,
+        help="rows for the per-row baseline (default: --rows)",
+    )
+    parser.add_argument("--sqlite", action="store_true", help="use a temp SQLite db")
+    args = parser.parse_args()
+
+    if args.sqlite:
+        db_url = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    else:
+        db_url = os.getenv("DATABASE_URL")
+    init_db(db_url)
+    session = get_session(db_url)
+    print(f"Dialect: {session.get_bind().dialect.name}")
+
+    ids = upsert_articles(
+        session,
+        [
+            {
+                "url": f"{_URL_PREFIX}{i}",
+                "title": f"Benchmark article {i}",
+                "body_text": "Benchmark body.",
+                "publish_date": datetime.date(2025, 1, 1),
+            }
+            for i in range(args.articles)
+        ],
+    )
+    article_ids = list(ids.values())
+    try:
+        single = args.single_rows or args.rows
+        timed(
+            "insert_analysis (per row)",
+            single,
+            lambda: [
+                insert_analysis(session, **r) for r in make_rows(article_ids, single)
+            ],
+        )
+        for every in args.commit_every:
+            timed(
+                f"insert_analyses (every {every})",
+                args.rows,
+                lambda: insert_analyses(
+                    session, make_rows(article_ids, args.rows), commit_every=every
+                ),
+            )
+    finally:
+        # Analyses go with their articles (ON DELETE CASCADE)
+        session.rollback()
+        session.execute(delete(Article).where(Article.url.like(f"{_URL_PREFIX}%")))
+        session.commit()
+
+
+if __name__ == "__main__":
+    main()
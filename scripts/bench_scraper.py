@@ -1,11 +1,24 @@
 # scripts/bench_scraper.py
 """
 Benchmark and validate the `fetch_articles` scraper in isolation.
+
+By default runs against a local fake Guardian server (see fake_guardian.py)
+and reports articles/sec, p50/p95/p99 request latency and parse cost for
+serial, pooled and concurrent fetching at several page sizes:
+
+    python scripts/bench_scraper.py --pages 20 --page-sizes 10 50 200 \
+        --latency 0.05 --error-rate 0.02
+
+`--live` times a single call against the real API instead (needs a key).
 """
+
+import argparse
 import os
+import statistics
 import sys
 import time
 
+import requests
 from dotenv import load_dotenv
 
 # Ensure project root on path to import app modules
@@ -16,10 +29,114 @@ sys.path.insert(0, top)
 env_path = os.path.join(top, ".env")
 load_dotenv(env_path)
 
+from app.agents import scraper  # noqa: E402
 from app.agents.scraper import fetch_articles  # noqa: E402
+from scripts.fake_guardian import FakeGuardianServer  # noqa: E402
 
 
-def main():
+def percentile(values, pct: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+class ParseTimer:
+    """Wraps scraper._parse_results to accumulate time spent parsing."""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self._parse = scraper._parse_results
+
+    def __call__(self, results):
+        start = time.perf_counter()
+        try:
+            return self._parse(results)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+
+def run_serial(url: str, page_size: int, pages: int, timer: ParseTimer):
+    """One fresh connection per page, no pool and no retries."""
+    articles, latencies = 0, []
+    for page in range(1, pages + 1):
+        start = time.perf_counter()
+        try:
+            r = requests.get(
+                url,
+                params={"q": "bench", "page-size": page_size, "page": page},
+                headers={"Connection": "close"},
+                timeout=5,
+            )
+            r.raise_for_status()
+            results = r.json()["response"]["results"]
+        except requests.RequestException:
+            results = []
+        latencies.append(time.perf_counter() - start)
+        articles += len(timer(results))
+    return articles, latencies
+
+
+def run_scraper(page_size: int, pages: int, workers: int):
+    """fetch_articles over the shared pooled session with `workers` threads."""
+    stats = []
+    articles = fetch_articles(
+        "bench",
+        "bench-key",
+        page_size=page_size,
+        max_pages=pages,
+        max_workers=workers,
+        stats=stats,
+    )
+    return len(articles), [s.latency for s in stats]
+
+
+def bench(args) -> None:
+    server = FakeGuardianServer(
+        pages=args.pages, latency=args.latency, error_rate=args.error_rate
+    ).start()
+    scraper.GUARDIAN_URL = server.url
+    timer = ParseTimer()
+    scraper._parse_results = timer
+
+    header = (
+        f"{'mode':<14}{'page_size':>10}{'articles':>10}{'art/s':>10}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'parse us/art':>14}"
+    )
+    print(header)
+    print("-" * len(header))
+    try:
+        for page_size in args.page_sizes:
+            modes = [
+                (
+                    "serial",
+                    lambda: run_serial(server.url, page_size, args.pages, timer),
+                ),
+                ("pooled", lambda: run_scraper(page_size, args.pages, 1)),
+                (
+                    f"concurrent x{args.workers}",
+                    lambda: run_scraper(page_size, args.pages, args.workers),
+                ),
+            ]
+            for name, run in modes:
+                timer.seconds = 0.0
+                start = time.perf_counter()
+                count, latencies = run()
+                elapsed = time.perf_counter() - start
+                ms = [v * 1000 for v in latencies]
+                print(
+                    f"{name:<14}{page_size:>10}{count:>10}"
+                    f"{count / elapsed if elapsed else 0:>10.0f}"
+                    f"{statistics.median(ms) if ms else float('nan'):>9.1f}"
+                    f"{percentile(ms, 95):>9.1f}{percentile(ms, 99):>9.1f}"
+                    f"{timer.seconds / count * 1e6 if count else 0:>14.1f}"
+                )
+    finally:
+        server.stop()
+
+
+def live() -> None:
     api_key = os.getenv("GUARDIAN_API_KEY")
     if not api_key:
         raise RuntimeError("GUARDIAN_API_KEY not set in .env")
@@ -35,5 +152,23 @@ def main():
         print(f"• {art['webTitle'][:60]}… ({art['publishDate']}) - {art['webUrl']}")
 
 
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Guardian scraper.")
+    parser.add_argument("--live", action="store_true", help="hit the real API once")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    # Cached pages would make every mode after the first look free
+    os.environ.pop("GUARDIAN_CACHE_DIR", None)
+    if args.live:
+        live()
+    else:
+        bench(args)
+
+
 if __name__ == "__main__":
     main()
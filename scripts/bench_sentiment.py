@@ -0,0 +1,146 @@
+# scripts/bench_sentiment.py
+"""
+Compare sentiment inference backends: PyTorch vs. ONNX Runtime (fp32 and
+dynamically quantized int8).
+
+Each backend runs in its own subprocess so load time and peak RSS are
+measured in isolation. Reports model load time, single-text p50/p95
+latency, batched throughput, peak RSS and label agreement with PyTorch:
+
+    python scripts/bench_sentiment.py --texts 200 --batch-size 16
+
+ONNX backends need `pip install optimum[onnxruntime]`.
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+top = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, top)
+
+BACKENDS = {
+    "torch": {"SENTIMENT_BACKEND": "torch"},
+    "onnx": {"SENTIMENT_BACKEND": "onnx", "SENTIMENT_QUANTIZE": "0"},
+    "onnx-int8": {"SENTIMENT_BACKEND": "onnx", "SENTIMENT_QUANTIZE": "1"},
+}
+
+_PHRASES = [
+    "shares surged after record data-centre revenue",
+    "the chipmaker cut its guidance amid export restrictions",
+    "analysts remain cautious about slowing demand",
+    "investors cheered the new product launch",
+    "regulators opened an antitrust investigation",
+    "margins held steady despite rising costs",
+    "the stock slumped on weak quarterly sales",
+    "demand for AI accelerators continues to outstrip supply",
+]
+
+
+def make_texts(n: int, seed: int = 7):
+    """Synthetic news-like texts with a realistic spread of lengths."""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(n):
+        sentences = max(1, int(rng.lognormvariate(2.0, 0.8)))
+        texts.append(". ".join(rng.choice(_PHRASES) for _ in range(sentences)) + ".")
+    return texts
+
+
+def worker(n_texts: int, batch_size: int) -> None:
+    """Runs inside the subprocess with the backend env already set."""
+    from app.agents import sentiment
+
+    texts = make_texts(n_texts)
+    start = time.perf_counter()
+    sentiment.warm_up()
+    load = time.perf_counter() - start
+
+    latencies = []
+    for text in texts[: min(50, len(texts))]:
+        t0 = time.perf_counter()
+        sentiment.analyze_sentiment(text)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    results = sentiment.analyze_sentiment_batch(texts, batch_size=batch_size)
+    elapsed = time.perf_counter() - t0
+
+    print(
+        json.dumps(
+            {
+                "backend": sentiment.backend_id(),
+                "load_s": load,
+                "p50_ms": statistics.median(latencies),
+                "p95_ms": sorted(latencies)[int(0.95 * (len(latencies) - 1))],
+                "texts_per_s": len(texts) / elapsed,
+                "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                "labels": [label for label, _ in results],
+            }
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sentiment backends.")
+    parser.add_argument("--texts", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS))
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.texts, args.batch_size)
+        return
+
+    runs = {}
+    for name in args.backends:
+        env = {**os.environ, **BACKENDS[name]}
+        proc = subprocess.run(
+            [
+                sys.executable,
+                os.path.abspath(__file__),
+                "--worker",
+                "--texts",
+                str(args.texts),
+                "--batch-size",
+                str(args.batch_size),
+            ],
+            env=env,
+            cwd=top,
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode:
+            print(f"{name}: failed\n{proc.stderr.strip().splitlines()[-1]}")
+            continue
+        runs[name] = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    reference = runs.get("torch", {}).get("labels")
+    header = (
+        f"{'backend':<11}{'load s':>8}{'p50 ms':>9}{'p95 ms':>9}"
+        f"{'texts/s':>10}{'RSS MB':>9}{'agree %':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+    for name, run in runs.items():
+        agree = (
+            100 * sum(a == b for a, b in zip(run["labels"], reference)) / len(reference)
+            if reference
+            else float("nan")
+        )
+        print(
+            f"{name:<11}{run['load_s']:>8.1f}{run['p50_ms']:>9.1f}"
+            f"{run['p95_ms']:>9.1f}{run['texts_per_s']:>10.1f}"
+            f"{run['rss_mb']:>9.0f}{agree:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# scripts/fake_guardian.py
+"""
+Local stand-in for the Guardian content search API.
+
+Serves generated `/search` result pages with configurable latency, page
+count and error rate, so the scraper can be benchmarked and exercised
+without a key or network noise.
+
+    python scripts/fake_guardian.py --port 8765 --pages 20 --latency 0.05
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+_EPOCH = datetime(2025, 6, 30, 12, 0, tzinfo=timezone.utc)
+
+
+def make_result(index: int, body_words: int = 400) -> dict:
+    """One Guardian-shaped search result; index 0 is the newest."""
+    published = _EPOCH - timedelta(hours=index)
+    return {
+        "webUrl": f"https://fake.guardian.local/article/{index}",
+        "webTitle": f"Generated headline {index}",
+        "webPublicationDate": published.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "fields": {"bodyText": " ".join(["market"] * body_words)},
+    }
+
+
+class FakeGuardianServer(ThreadingHTTPServer):
+    """
+    HTTP server answering `/search` with `pages` pages of generated results.
+    Each request sleeps `latency` seconds; a fraction `error_rate` of
+    requests get a 503 instead.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        port: int = 0,
+        pages: int = 10,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        body_words: int = 400,
+    ):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.pages = pages
+        self.latency = latency
+        self.error_rate = error_rate
+        self.body_words = body_words
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/search"
+
+    def start(self) -> "FakeGuardianServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server: FakeGuardianServer = self.server
+        with server._lock:
+            server.requests += 1
+        if server.latency:
+            time.sleep(server.latency)
+
+        parsed = urlparse(self.path)
+        if parsed.path != "/search":
+            self.send_error(404)
+            return
+        if random.random() < server.error_rate:
+            self.send_error(503)
+            return
+
+        query = parse_qs(parsed.query)
+        page_size = int(query.get("page-size", ["10"])[0])
+        page = int(query.get("page", ["1"])[0])
+        start = (page - 1) * page_size
+        payload = {
+            "response": {
+                "status": "ok",
+                "currentPage": page,
+                "pages": server.pages,
+                "results": (
+                    [
+                        make_result(i, server.body_words)
+                        for i in range(start, start + page_size)
+                    ]
+                    if page <= server.pages
+                    else []
+                ),
+            }
+        }
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeGuardianServer(args.port, args.pages, args.latency, args.error_rate)
+    print(f"Serving fake Guardian API at {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+# scripts/fake_openai.py
+"""
+Local stand-in for the OpenAI Files and Batch endpoints.
+
+Accepts JSONL batch uploads, reports each batch as in progress for a few
+polls, then "completes" it with a deterministic recommendation per chat
+request (buy/sell/hold from the sentiment score in the prompt). Point the
+OpenAI client at it with OPENAI_BASE_URL:
+
+    python scripts/fake_openai.py --port 8766 --polls 2
+    OPENAI_BASE_URL=http://127.0.0.1:8766/v1 python scripts/backfill_recommendations.py
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import default as email_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+_HEADLINE_RE = re.compile(r"^Headline: (.*)$", re.M)
+_SCORE_RE = re.compile(r"^Sentiment score: (-?[\d.]+)$", re.M)
+
+
+def answer(body: Dict) -> str:
+    """The assistant reply to one chat request, as a JSON ArticleRecc."""
+    prompt = body["messages"][-1]["content"]
+    title = _HEADLINE_RE.search(prompt)
+    score = float(_SCORE_RE.search(prompt).group(1)) if _SCORE_RE.search(prompt) else 0
+    rec = "buy" if score > 0.3 else "sell" if score < -0.3 else "hold"
+    return json.dumps(
+        {
+            "title": title.group(1) if title else "",
+            "sentiment_score": score,
+            "recommendation": rec,
+            "rationale": f"Stand-in answer for a sentiment score of {score:.2f}.",
+        }
+    )
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """
+    HTTP server for `/v1/files` and `/v1/batches`. A batch stays
+    "in_progress" for `polls` retrievals, then completes; a fraction
+    `error_rate` of its requests fail with a 500 in the output file.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, polls: int = 1, error_rate: float = 0.0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.polls = polls
+        self.error_rate = error_rate
+        self.files: Dict[str, Dict] = {}
+        self.batches: Dict[str, Dict] = {}
+        self.requests = 0
+        # Re-entrant: completing a batch (under the lock) allocates ids
+        self._lock = threading.RLock()
+        self._ids = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def new_id(self, prefix: str) -> str:
+        with self._lock:
+            self._ids += 1
+            return f"{prefix}-{self._ids}"
+
+    def add_file(self, content: bytes, filename: str, purpose: str) -> Dict:
+        meta = {
+            "id": self.new_id("file"),
+            "object": "file",
+            "bytes": len(content),
+            "created_at": int(time.time()),
+            "filename": filename,
+            "purpose": purpose,
+            "status": "processed",
+        }
+        self.files[meta["id"]] = {"meta": meta, "content": content}
+        return meta
+
+    def complete(self, batch: Dict) -> None:
+        """Run every request of `batch` and attach its output/error files."""
+        lines = self.files[batch["input_file_id"]]["content"].decode().splitlines()
+        outputs, errors = [], []
+        for line in filter(None, lines):
+            req = json.loads(line)
+            if random.random() < self.error_rate:
+                errors.append(
+                    {
+                        "id": self.new_id("req"),
+                        "custom_id": req["custom_id"],
+                        "response": {"status_code": 500, "body": {}},
+                        "error": {"code": "server_error", "message": "stand-in"},
+                    }
+                )
+                continue
+            body = {
+                "id": self.new_id("chatcmpl"),
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": req["body"]["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {
+                            "role": "assistant",
+                            "content": answer(req["body"]),
+                        },
+                    }
+                ],
+            }
+            outputs.append(
+                {
+                    "id": self.new_id("req"),
+                    "custom_id": req["custom_id"],
+                    "response": {"status_code": 200, "body": body},
+                    "error": None,
+                }
+            )
+
+        def jsonl(rows):
+            return "".join(json.dumps(r) + "\n" for r in rows).encode()
+
+        batch["status"] = "completed"
+        batch["completed_at"] = int(time.time())
+        batch["output_file_id"] = self.add_file(
+            jsonl(outputs), "output.jsonl", "batch_output"
+        )["id"]
+        if errors:
+            batch["error_file_id"] = self.add_file(
+                jsonl(errors), "errors.jsonl", "batch_output"
+            )["id"]
+        batch["request_counts"] = {
+            "total": len(outputs) + len(errors),
+            "completed": len(outputs),
+            "failed": len(errors),
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _send(self, status: int, payload=None, raw: bytes = None):
+        body = raw if raw is not None else json.dumps(payload).encode()
+        self.send_response(status)
+        ctype = "application/octet-stream" if raw is not None else "application/json"
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_POST(self):
+        server: FakeOpenAIServer = self.server
+        server.requests += 1
+        if self.path == "/v1/files":
+            form = BytesParser(policy=email_policy).parsebytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode()
+                + self._body()
+            )
+            fields, content, filename = {}, b"", "upload.jsonl"
+            for part in form.iter_parts():
+                name = part.get_param("name", header="content-disposition")
+                if name == "file":
+                    content = part.get_payload(decode=True)
+                    filename = part.get_filename() or filename
+                else:
+                    fields[name] = part.get_payload(decode=True).decode()
+            self._send(
+                200, server.add_file(content, filename, fields.get("purpose", ""))
+            )
+        elif self.path == "/v1/batches":
+            req = json.loads(self._body())
+            if req.get("input_file_id") not in server.files:
+                self._send(404, {"error": {"message": "No such file"}})
+                return
+            batch = {
+                "id": server.new_id("batch"),
+                "object": "batch",
+                "endpoint": req["endpoint"],
+                "input_file_id": req["input_file_id"],
+                "completion_window": req["completion_window"],
+                "status": "validating",
+                "created_at": int(time.time()),
+                "output_file_id": None,
+                "error_file_id": None,
+                "polls_left": server.polls,
+            }
+            server.batches[batch["id"]] = batch
+            self._send(200, _public(batch))
+        else:
+            self._send(404, {"error": {"message": "Unknown endpoint"}})
+
+    def do_GET(self):
+        server: FakeOpenAIServer = self.server
+        server.requests += 1
+        parts = self.path.strip("/").split("/")
+        if parts[:2] == ["v1", "batches"] and len(parts) == 3:
+            batch = server.batches.get(parts[2])
+            if batch is None:
+                self._send(404, {"error": {"message": "No such batch"}})
+                return
+            with server._lock:
+                if batch["status"] != "completed":
+                    batch["polls_left"] -= 1
+                    batch["status"] = "in_progress"
+                    if batch["polls_left"] < 0:
+                        server.complete(batch)
+            self._send(200, _public(batch))
+        elif parts[:2] == ["v1", "files"] and len(parts) == 4:
+            stored = server.files.get(parts[2])
+            if stored is None:
+                self._send(404, {"error": {"message": "No such file"}})
+                return
+            self._send(200, raw=stored["content"])
+        else:
+            self._send(404, {"error": {"message": "Unknown endpoint"}})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _public(batch: Dict) -> Dict:
+    return {k: v for k, v in batch.items() if k != "polls_left"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--polls", type=int, default=2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(args.port, args.polls, args.error_rate)
+    print(f"Serving fake OpenAI batch API at {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
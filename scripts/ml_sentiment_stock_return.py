@@ -120,8 +120,8 @@ def fetch_and_merge_vix(df):
     return df
 
 
-def main():
-    session = get_session()
+def main(session=None):
+    session = session or get_session()
     article_df = load_article_sentiment_prices(session)
     next_price_df = load_next_day_prices(session)
     df = merge_data(article_df, next_price_df)
@@ -4,7 +4,12 @@ import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
-from app.agents.db_writer import Base  # import Declarative base for tables
+from app.agents.db_writer import (  # import Declarative base for tables
+    Base,
+    dispose_engines,
+    get_session,
+    init_db,
+)
 from app.web import create_app
 
 
@@ -24,11 +29,21 @@ def _engine(_test_db_url):
 
 
 @pytest.fixture
-def client(_engine):
+def session():
+    # A fresh in-memory SQLite database per test
+    init_db("sqlite:///:memory:")
+    session = get_session("sqlite:///:memory:")
+    yield session
+    session.close()
+    dispose_engines()
+
+
+@pytest.fixture
+def client(_engine, monkeypatch):
     # Override get_session to use the in-memory DB
     from app.agents import db_writer
 
-    db_writer.get_session = lambda: sessionmaker(bind=_engine)()
+    monkeypatch.setattr(db_writer, "get_session", sessionmaker(bind=_engine))
 
     app = create_app()
     app.config["TESTING"] = True
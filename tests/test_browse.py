@@ -2,3 +2,22 @@ def test_browse_status(client):
     resp = client.get("/browse")
     assert resp.status_code == 200
     assert b"<table" in resp.data
+
+
+def test_request_session_is_closed_on_teardown(client, monkeypatch):
+    from app.agents import db_writer
+
+    opened, closed = [], []
+    make_session = db_writer.get_session
+
+    def tracked_session():
+        session = make_session()
+        close = session.close
+        session.close = lambda: closed.append(session) or close()
+        opened.append(session)
+        return session
+
+    monkeypatch.setattr(db_writer, "get_session", tracked_session)
+    client.get("/browse")
+    client.get("/browse")
+    assert len(opened) == 2 and closed == opened
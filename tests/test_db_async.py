@@ -0,0 +1,67 @@
+import asyncio
+import datetime
+
+from app.agents import db_async
+
+URL = "sqlite:///:memory:"
+
+
+def _run(coro_fn):
+    async def run():
+        await db_async.init_db(URL)
+        try:
+            return await coro_fn()
+        finally:
+            await db_async.dispose_engines()
+
+    return asyncio.run(run())
+
+
+def test_async_url_swaps_in_async_drivers():
+    assert db_async.async_url("postgresql://u@h/db").drivername == "postgresql+asyncpg"
+    assert (
+        db_async.async_url("postgresql+psycopg2://u@h/db").drivername
+        == "postgresql+asyncpg"
+    )
+    assert db_async.async_url("sqlite:///x.db").drivername == "sqlite+aiosqlite"
+
+
+def test_async_upserts_match_sync_semantics():
+    async def scenario():
+        async with db_async.get_async_session(URL) as session:
+            art1 = await db_async.upsert_article(
+                session, "http://a", "Title v1", "Body", datetime.date(2025, 1, 1)
+            )
+            art2 = await db_async.upsert_article(
+                session, "http://a", "Title v2", "Body", datetime.date(2025, 1, 2)
+            )
+            ana = await db_async.insert_analysis(
+                session, art2.article_id, "POSITIVE", 0.8, "buy", "r", prompt_tokens=9
+            )
+            await db_async.upsert_stock_price(
+                session, datetime.date(2025, 1, 2), 1, 2, 3, 0.5, 100
+            )
+            price = await db_async.upsert_stock_price(
+                session, datetime.date(2025, 1, 2), 1, 4, 5, 0.5, 200
+            )
+            return art1.article_id, art2, ana, price
+
+    first_id, art, ana, price = _run(scenario)
+    assert art.article_id == first_id
+    assert (art.title, art.publish_date) == ("Title v2", datetime.date(2025, 1, 2))
+    assert ana.analysis_id and ana.analysis_date and ana.prompt_tokens == 9
+    assert (float(price.close_price), price.volume) == (4.0, 200)
+
+
+def test_async_writes_run_concurrently():
+    async def one(i):
+        async with db_async.get_async_session(URL) as session:
+            art = await db_async.upsert_article(
+                session, f"http://c/{i}", "T", "B", datetime.date(2025, 1, 1)
+            )
+            return art.article_id
+
+    async def scenario():
+        return await asyncio.gather(*(one(i) for i in range(5)))
+
+    assert len(set(_run(scenario))) == 5
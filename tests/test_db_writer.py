@@ -6,23 +6,54 @@ import pytest
 from sqlalchemy import inspect
 
 from app.agents.db_writer import (
+    DB_POOL_SIZE,
+    Analysis,
+    Article,
+    _copy_buffer,
+    dispose_engines,
+    get_cached_sentiments,
+    get_engine,
+    get_scrape_cursor,
     get_session,
+    insert_analyses,
     insert_analysis,
+    link_article_ticker,
+    link_article_tickers,
+    prune_sentiment_cache,
+    store_cached_sentiments,
     upsert_article,
+    upsert_articles,
+    upsert_scrape_cursor,
     upsert_stock_price,
 )
 
 
-@pytest.fixture
-def session():
-    # in-memory SQLite for fast tests
-    return get_session(db_url="sqlite:///:memory:")
-
-
 def test_get_session_and_tables_created(session):
     inspector = inspect(session.get_bind())
     tables = set(inspector.get_table_names())
-    assert {"articles", "analysis", "stock_prices"}.issubset(tables)
+    assert {"articles", "analysis", "stock_prices", "scrape_cursors"}.issubset(tables)
+    indexes = {i["name"]: i["column_names"] for i in inspector.get_indexes("analysis")}
+    assert indexes["idx_analysis_article_date"] == ["article_id", "analysis_date"]
+    indexes = {
+        i["name"]: i["column_names"] for i in inspector.get_indexes("sentiment_cache")
+    }
+    assert indexes["idx_sentiment_cache_last_used"] == ["last_used_at"]
+    indexes = {
+        i["name"]: i["column_names"] for i in inspector.get_indexes("article_tickers")
+    }
+    assert indexes["idx_article_tickers_ticker"] == ["ticker"]
+
+
+def test_get_engine_is_cached_and_pooled(tmp_path):
+    url = f"sqlite:///{tmp_path}/pool.db"
+    try:
+        engine = get_engine(url)
+        assert get_engine(url) is engine
+        assert engine.pool.size() == DB_POOL_SIZE
+        assert engine.pool._pre_ping
+        assert get_session(url).get_bind() is engine
+    finally:
+        dispose_engines()
 
 
 def test_upsert_article_insert_and_update(session):
@@ -79,6 +110,36 @@ def test_insert_analysis(session):
     assert ana.price_date == datetime.date(2025, 3, 4)
 
 
+def test_insert_analyses_commits_in_chunks(session):
+    art = upsert_article(session, "http://bulk", "T", "B", datetime.date(2025, 6, 1))
+    commits = []
+    session.commit = lambda commit=session.commit: commits.append(1) or commit()
+    rows = (
+        {
+            "article_id": art.article_id,
+            "sentiment_label": "POSITIVE",
+            "sentiment_score": i / 10,
+            "recommendation": "buy",
+            "rationale": f"r{i}",
+        }
+        for i in range(7)
+    )
+
+    assert insert_analyses(session, rows, commit_every=3) == 7
+    assert len(commits) == 3
+    assert sorted(a.rationale for a in session.query(Analysis)) == [
+        f"r{i}" for i in range(7)
+    ]
+    assert insert_analyses(session, []) == 0
+
+
+def test_copy_buffer_escapes_text_format():
+    buf = _copy_buffer(
+        [{"a": 1, "b": "tab\there\nback\\slash"}, {"a": None}], ["a", "b"]
+    )
+    assert buf.read() == "1\ttab\\there\\nback\\\\slash\n\\N\t\\N\n"
+
+
 def test_upsert_stock_price_insert_and_update(session):
     dt = datetime.date(2025, 4, 4)
     sp1 = upsert_stock_price(
@@ -111,3 +172,93 @@ def test_upsert_stock_price_insert_and_update(session):
     assert float(sp2.open_price) == 11.0
     assert float(sp2.close_price) == 13.0
     assert sp2.volume == 200000
+
+
+def test_scrape_cursor_insert_and_advance(session):
+    assert get_scrape_cursor(session, "nvidia") is None
+
+    first = datetime.datetime(2025, 5, 5, 10, 0)
+    cur1 = upsert_scrape_cursor(session, "nvidia", first, "http://a")
+    assert cur1.last_published_at == first
+    assert cur1.last_url == "http://a"
+
+    second = datetime.datetime(2025, 5, 6, 8, 30)
+    upsert_scrape_cursor(session, "nvidia", second, "http://b")
+    cur2 = get_scrape_cursor(session, "nvidia")
+    assert cur2.last_published_at == second
+    assert cur2.last_url == "http://b"
+
+
+def test_link_article_ticker_is_idempotent(session):
+    art = upsert_article(session, "http://t", "T", "B", datetime.date(2025, 6, 6))
+    link_article_ticker(session, art.article_id, "NVDA")
+    link_article_ticker(session, art.article_id, "NVDA")
+    link_article_ticker(session, art.article_id, "AMD")
+    session.refresh(art)
+    assert sorted(t.ticker for t in art.tickers) == ["AMD", "NVDA"]
+
+
+def test_upsert_articles_bulk_insert_update_and_skip(session):
+    def row(i, title):
+        return {
+            "url": f"http://b/{i}",
+            "title": title,
+            "body_text": "Body",
+            "publish_date": datetime.date(2025, 7, 1),
+        }
+
+    ids = upsert_articles(session, [row(i, "v1") for i in range(5)], chunk_size=2)
+    assert sorted(ids) == [f"http://b/{i}" for i in range(5)]
+    assert len(set(ids.values())) == 5
+    fetched = {a.url: a.fetched_at for a in session.query(Article)}
+
+    # One changed title, four unchanged rows, one new url; duplicates collapse
+    rows = [row(i, "v2" if i == 0 else "v1") for i in range(6)] + [row(5, "v3")]
+    ids2 = upsert_articles(session, rows, chunk_size=4)
+    assert {u: ids2[u] for u in ids} == ids
+    session.expire_all()
+    arts = {a.url: a for a in session.query(Article)}
+    assert len(arts) == 6
+    assert arts["http://b/0"].title == "v2"
+    assert arts["http://b/5"].title == "v3"
+    assert all(
+        arts[f"http://b/{i}"].fetched_at == fetched[f"http://b/{i}"]
+        for i in range(1, 5)
+    )
+
+
+def test_link_article_tickers_is_idempotent(session):
+    ids = upsert_articles(
+        session,
+        [
+            {
+                "url": "http://t2",
+                "title": "T",
+                "body_text": "B",
+                "publish_date": datetime.date(2025, 6, 6),
+            }
+        ],
+    )
+    article_id = ids["http://t2"]
+    link_article_tickers(session, [(article_id, "NVDA"), (article_id, "NVDA")])
+    link_article_tickers(session, [(article_id, "NVDA"), (article_id, "AMD")])
+    link_article_tickers(session, [])
+    art = session.get(Article, article_id)
+    assert sorted(t.ticker for t in art.tickers) == ["AMD", "NVDA"]
+
+
+def test_sentiment_cache_store_get_and_prune(session):
+    store_cached_sentiments(session, "m", {"h1": ("POSITIVE", 0.9)})
+    store_cached_sentiments(
+        session, "m", {"h1": ("NEGATIVE", 0.1), "h2": ("NEGATIVE", 0.8)}
+    )
+    assert get_cached_sentiments(session, "m", ["h1", "h2", "h3"]) == {
+        "h1": ("POSITIVE", 0.9),
+        "h2": ("NEGATIVE", 0.8),
+    }
+    assert get_cached_sentiments(session, "other-model", ["h1"]) == {}
+
+    assert prune_sentiment_cache(session, max_rows=1) == 1
+    assert len(get_cached_sentiments(session, "m", ["h1", "h2"])) == 1
+    assert prune_sentiment_cache(session, max_age=datetime.timedelta(days=-1)) == 1
+    assert get_cached_sentiments(session, "m", ["h1", "h2"]) == {}
@@ -0,0 +1,98 @@
+import pytest
+import requests
+
+from app.agents import http_client
+
+
+class DummyResponse:
+    def __init__(self, status_code: int = 200, headers: dict = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def close(self) -> None:
+        pass
+
+
+class ScriptedSession:
+    """Returns (or raises) the scripted outcomes in order."""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def request(self, method, url, timeout=None, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(http_client, "_sleep", delays.append)
+    return delays
+
+
+def _use(monkeypatch, session):
+    monkeypatch.setattr(http_client, "get_http_session", lambda: session)
+
+
+def test_get_http_session_is_shared():
+    assert http_client.get_http_session() is http_client.get_http_session()
+
+
+def test_request_retries_5xx_then_succeeds(monkeypatch, sleeps):
+    session = ScriptedSession(
+        [DummyResponse(503), DummyResponse(502), DummyResponse(200)]
+    )
+    _use(monkeypatch, session)
+
+    resp, stats = http_client.get("http://example.com")
+    assert resp.status_code == 200
+    assert stats.attempts == 3
+    assert stats.retries == 2
+    assert stats.status == 200
+    assert stats.latency >= 0.0
+    assert len(sleeps) == 2
+
+
+def test_request_honours_retry_after(monkeypatch, sleeps):
+    session = ScriptedSession(
+        [DummyResponse(429, {"Retry-After": "7"}), DummyResponse(200)]
+    )
+    _use(monkeypatch, session)
+
+    resp, stats = http_client.get("http://example.com")
+    assert resp.status_code == 200
+    assert sleeps == [7.0]
+
+
+def test_request_returns_last_error_response(monkeypatch, sleeps):
+    session = ScriptedSession([DummyResponse(500)] * 3)
+    _use(monkeypatch, session)
+
+    resp, stats = http_client.get("http://example.com", max_retries=2)
+    assert resp.status_code == 500
+    assert stats.retries == 2
+    assert session.calls == 3
+
+
+def test_request_reraises_connection_error(monkeypatch, sleeps):
+    session = ScriptedSession([requests.ConnectionError("down")] * 2)
+    _use(monkeypatch, session)
+
+    with pytest.raises(requests.ConnectionError):
+        http_client.get("http://example.com", max_retries=1)
+    assert session.calls == 2
+
+
+def test_request_does_not_retry_client_errors(monkeypatch, sleeps):
+    session = ScriptedSession([DummyResponse(404)])
+    _use(monkeypatch, session)
+
+    resp, stats = http_client.get("http://example.com")
+    assert resp.status_code == 404
+    assert stats.retries == 0
+    assert sleeps == []
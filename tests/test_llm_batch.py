@@ -0,0 +1,117 @@
+import datetime
+
+import pytest
+from openai import OpenAI
+
+from app.agents import llm_batch
+from app.agents.db_writer import (
+    Analysis,
+    get_unanalyzed_articles,
+    upsert_article,
+)
+from app.agents.llm_batch import BatchState, parse_results, run_backfill
+from scripts.fake_openai import FakeOpenAIServer
+
+
+@pytest.fixture
+def server():
+    srv = FakeOpenAIServer(polls=2).start()
+    yield srv
+    srv.stop()
+
+
+def _articles(session, n):
+    for i in range(n):
+        upsert_article(
+            session,
+            f"http://example.com/{i}",
+            f"Headline {i}",
+            f"Body {i}",
+            datetime.date(2025, 1, 1 + i),
+        )
+    return [
+        (a.article_id, a.title, a.body_text, "POSITIVE", 0.9 if i % 2 else -0.9)
+        for i, a in enumerate(get_unanalyzed_articles(session))
+    ]
+
+
+def test_backfill_submits_polls_and_ingests(session, server, tmp_path):
+    client = OpenAI(api_key="test", base_url=server.url, max_retries=0)
+    articles = _articles(session, 4)
+
+    counts = run_backfill(session, client, str(tmp_path), articles, poll_interval=0)
+
+    assert counts == {"ingested": 4, "failed": 0}
+    recs = {a.article_id: a.recommendation for a in session.query(Analysis)}
+    assert recs == {
+        articles[0][0]: "sell",
+        articles[1][0]: "buy",
+        articles[2][0]: "sell",
+        articles[3][0]: "buy",
+    }
+    assert all(a.prompt_tokens for a in session.query(Analysis))
+    assert get_unanalyzed_articles(session) == []
+    assert (tmp_path / "requests.jsonl").read_text().count("\n") == 4
+
+
+def test_backfill_resumes_without_resubmitting(session, server, tmp_path):
+    client = OpenAI(api_key="test", base_url=server.url, max_retries=0)
+    articles = _articles(session, 2)
+
+    with pytest.raises(TimeoutError):
+        run_backfill(session, client, str(tmp_path), articles, timeout=-1)
+    batch_id = BatchState(str(tmp_path))["batch_id"]
+    assert batch_id and session.query(Analysis).count() == 0
+
+    assert run_backfill(session, client, str(tmp_path), poll_interval=0) == {
+        "ingested": 2,
+        "failed": 0,
+    }
+    assert list(server.batches) == [batch_id]
+    # A finished work directory ingests nothing twice
+    assert run_backfill(session, client, str(tmp_path), poll_interval=0) == {
+        "ingested": 0,
+        "failed": 0,
+    }
+    assert session.query(Analysis).count() == 2
+
+
+def test_backfill_resumes_after_the_last_committed_chunk(
+    session, server, tmp_path, monkeypatch
+):
+    client = OpenAI(api_key="test", base_url=server.url, max_retries=0)
+    articles = _articles(session, 5)
+    insert_analyses = llm_batch.insert_analyses
+    chunks = []
+
+    def crash_on_second_chunk(session, rows, commit_every):
+        chunks.append(len(rows))
+        if len(chunks) == 2:
+            raise RuntimeError("killed mid-ingest")
+        return insert_analyses(session, rows, commit_every)
+
+    monkeypatch.setattr(llm_batch, "insert_analyses", crash_on_second_chunk)
+    with pytest.raises(RuntimeError):
+        run_backfill(
+            session, client, str(tmp_path), articles, poll_interval=0, commit_every=2
+        )
+    assert session.query(Analysis).count() == 2
+
+    monkeypatch.setattr(llm_batch, "insert_analyses", insert_analyses)
+    counts = run_backfill(session, client, str(tmp_path), commit_every=2)
+
+    assert counts == {"ingested": 3, "failed": 0}
+    assert session.query(Analysis).count() == 5
+    assert get_unanalyzed_articles(session) == []
+
+
+def test_parse_results_reports_failed_and_malformed_requests():
+    lines = [
+        '{"custom_id": "a", "response": {"status_code": 500, "body": {}},'
+        ' "error": {"code": "server_error"}}',
+        '{"custom_id": "b", "response": {"status_code": 200, "body":'
+        ' {"choices": [{"message": {"content": "not-json"}}]}}, "error": null}',
+    ]
+    results = parse_results(lines)
+    assert isinstance(results["a"], Exception)
+    assert isinstance(results["b"], Exception)
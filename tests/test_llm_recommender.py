@@ -46,6 +46,9 @@ def patch_openai(monkeypatch):
     )
     dummy = DummyClient(DummyCompletions(good_json))
     monkeypatch.setattr(mod, "_client", dummy)
+    # Fresh tail-latency state so failures in one test don't trip another
+    monkeypatch.setattr(mod, "_breaker", mod.CircuitBreaker(5, 30))
+    monkeypatch.setattr(mod, "_latencies", mod.LatencyTracker())
     yield
 
 
@@ -78,3 +81,361 @@ def test_recommend_api_error(monkeypatch):
 
     with pytest.raises(APIRecommendationError):
         recommend("X", "Y", 0.0)
+
+
+class AsyncDummyClient:
+    """Async client whose reply (or error) is chosen from the headline."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.in_flight = self.max_in_flight = 0
+        self.closed = False
+        self.chat = type("Chat", (), {"completions": self})
+
+    async def create(self, *args, messages, **kwargs):
+        import asyncio
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        prompt = messages[-1]["content"]
+        if "Headline: down" in prompt:
+            raise OpenAIError("API down")
+        content = (
+            "not-a-json"
+            if "Headline: bad" in prompt
+            else (
+                '{"title":"T","sentiment_score":0.1,'
+                '"recommendation":"buy","rationale":"ok"}'
+            )
+        )
+        return DummyCompletions(content).create()
+
+    async def close(self):
+        self.closed = True
+
+
+def test_recommend_many_keeps_order_and_per_item_errors(monkeypatch):
+    import app.agents.llm_recommender as mod
+
+    client = AsyncDummyClient(delay=0.01)
+    monkeypatch.setattr(mod, "_new_async_client", lambda: client)
+
+    items = [("ok", "a", 0.1), ("down", "b", 0.0), ("bad", "c", 0.0)] * 4
+    results = mod.recommend_many(items, max_concurrency=3)
+
+    assert len(results) == len(items)
+    for (title, _, _), res in zip(items, results):
+        expected = {
+            "ok": ArticleRecc,
+            "down": APIRecommendationError,
+            "bad": ValidationError,
+        }[title]
+        assert isinstance(res, expected)
+    assert client.max_in_flight == 3
+    assert client.closed
+
+
+def test_recommend_many_times_out_slow_calls(monkeypatch):
+    import app.agents.llm_recommender as mod
+
+    monkeypatch.setattr(mod, "_new_async_client", lambda: AsyncDummyClient(1.0))
+    (res,) = mod.recommend_many([("ok", "a", 0.1)], timeout=0.05)
+    assert isinstance(res, APIRecommendationError)
+
+
+def test_token_bucket_limits_requests_per_minute():
+    import asyncio
+    import time
+
+    from app.agents.llm_recommender import TokenBucketLimiter
+
+    async def run():
+        # 2 requests up front, then one per 0.05s (1200/min)
+        limiter = TokenBucketLimiter(requests_per_min=1200, tokens_per_min=1e9)
+        limiter._available[0] = 2.0
+        start = time.monotonic()
+        for _ in range(4):
+            await limiter.acquire(10)
+        return time.monotonic() - start
+
+    assert 0.08 <= asyncio.run(run()) < 0.5
+
+
+def test_recommend_caches_responses(monkeypatch, tmp_path):
+    import app.agents.llm_recommender as mod
+
+    calls = []
+
+    class CountingCompletions(DummyCompletions):
+        def create(self, *args, **kwargs):
+            calls.append(kwargs["messages"])
+            return super().create(*args, **kwargs)
+
+    good_json = (
+        '{"title":"T","sentiment_score":0.5,'
+        '"recommendation":"buy","rationale":"Cached."}'
+    )
+    monkeypatch.setattr(mod, "_client", DummyClient(CountingCompletions(good_json)))
+    monkeypatch.setenv("LLM_CACHE_DIR", str(tmp_path))
+    before = mod.get_cache_stats()
+
+    first = recommend("Headline", "Body", 0.5)
+    second = recommend("Headline", "Body", 0.5)
+    assert second == first and len(calls) == 1
+    recommend("Headline", "Other body", 0.5)
+    recommend("Headline", "Body", 0.5, use_cache=False)
+    assert len(calls) == 3
+
+    after = mod.get_cache_stats()
+    assert after["hits"] - before["hits"] == 1
+    assert after["misses"] - before["misses"] == 2
+
+
+def test_select_passages_fits_budget_and_keeps_key_sentences():
+    from app.agents.llm_recommender import count_tokens, select_passages
+
+    filler = " ".join(
+        f"The weather in the city was mild on day {i} of the festival."
+        for i in range(200)
+    )
+    text = (
+        "Nvidia beat forecasts as data-centre revenue hit a record. "
+        + filler
+        + " Analysts raised guidance after quarterly revenue rose 94%."
+    )
+    short = "Nvidia shares rose."
+    assert select_passages("Nvidia revenue", short, budget=100) == short
+
+    kept = select_passages("Nvidia revenue record", text, budget=60)
+    assert count_tokens(kept) <= 70
+    assert kept.startswith("Nvidia beat forecasts")
+    assert "Analysts raised guidance" in kept
+    assert "..." in kept
+
+
+@pytest.mark.parametrize("estimate", [False, True])
+def test_select_passages_cuts_an_over_budget_sentence(monkeypatch, estimate):
+    import app.agents.llm_recommender as mod
+
+    if estimate:
+        monkeypatch.setattr(mod, "_encoding", False)
+    kept = mod.select_passages("Nvidia earnings", "word " * 3000, budget=200)
+
+    assert kept.startswith("word word")
+    assert kept.endswith(" ...")
+    assert 150 <= mod.count_tokens(kept) <= 200
+
+
+def test_count_tokens_estimates_when_encoding_cannot_load(monkeypatch):
+    import sys
+    import types
+
+    import app.agents.llm_recommender as mod
+
+    def offline(model):
+        raise ConnectionError("no network to fetch the encoding")
+
+    monkeypatch.setitem(
+        sys.modules, "tiktoken", types.SimpleNamespace(encoding_for_model=offline)
+    )
+    monkeypatch.setattr(mod, "_encoding", None)
+    assert mod.count_tokens("x" * 40) == 10
+    assert mod._encoding is False
+
+
+def test_recommend_records_prompt_tokens():
+    rec = recommend("Headline", "Some text", 0.5)
+    assert rec.prompt_tokens and rec.prompt_tokens > 0
+
+
+def test_recommend_packed_retries_missing_and_invalid_items(monkeypatch):
+    import json
+    import re
+
+    import app.agents.llm_recommender as mod
+
+    class PackedClient(AsyncDummyClient):
+        def __init__(self):
+            super().__init__()
+            self.packed_sizes = []
+
+        async def create(self, *args, messages, **kwargs):
+            prompt = messages[-1]["content"]
+            if "JSON array" not in prompt:
+                return await super().create(*args, messages=messages, **kwargs)
+            ids = [int(i) for i in re.findall(r"^\[(\d+)\]$", prompt, re.M)]
+            self.packed_sizes.append(len(ids))
+            reply = []
+            for i in ids:
+                if i == 1:
+                    continue  # left out
+                rec = "maybe" if i == 2 else "sell"  # invalid enum for 2
+                reply.append(
+                    {
+                        "id": i,
+                        "title": f"T{i}",
+                        "sentiment_score": -0.2,
+                        "recommendation": rec,
+                        "rationale": "packed",
+                    }
+                )
+            return DummyCompletions("```json\n" + json.dumps(reply) + "\n```").create()
+
+    client = PackedClient()
+    monkeypatch.setattr(mod, "_new_async_client", lambda: client)
+    items = [(f"ok {i}", "short text", 0.1) for i in range(5)]
+    results = mod.recommend_packed(items, max_items=5)
+
+    assert client.packed_sizes == [5]
+    assert [r.rationale for r in results] == ["packed", "ok", "ok", "packed", "packed"]
+    assert all(r.prompt_tokens for r in results)
+
+
+def test_recommend_packed_caches_under_the_packed_prompt(monkeypatch, tmp_path):
+    import json
+    import re
+
+    import app.agents.llm_recommender as mod
+
+    class PackedClient(AsyncDummyClient):
+        packed = 0
+
+        async def create(self, *args, messages, **kwargs):
+            ids = re.findall(r"^\[(\d+)\]$", messages[-1]["content"], re.M)
+            self.packed += 1
+            reply = [
+                {
+                    "id": int(i),
+                    "title": "T",
+                    "sentiment_score": 0.3,
+                    "recommendation": "buy",
+                    "rationale": "packed",
+                }
+                for i in ids
+            ]
+            return DummyCompletions(json.dumps(reply)).create()
+
+    client = PackedClient()
+    monkeypatch.setattr(mod, "_new_async_client", lambda: client)
+    monkeypatch.setenv("LLM_CACHE_DIR", str(tmp_path))
+    items = [(f"Headline {i}", "short text", 0.3) for i in range(3)]
+
+    assert [r.rationale for r in mod.recommend_packed(items)] == ["packed"] * 3
+    assert [r.rationale for r in mod.recommend_packed(items)] == ["packed"] * 3
+    assert client.packed == 1
+    # The single-article prompt was never sent, so it is not answered from cache
+    assert recommend(*items[0]).rationale == "Balanced."
+
+
+def test_packs_respect_count_and_token_budget():
+    from app.agents.llm_recommender import _packs
+
+    assert _packs([10, 10, 10, 10, 10], max_items=2, budget=100) == [
+        [0, 1],
+        [2, 3],
+        [4],
+    ]
+    assert _packs([60, 50, 500, 10], max_items=8, budget=100) == [[0], [1], [2], [3]]
+
+
+def test_circuit_breaker_fast_fails_then_probes(monkeypatch):
+    import app.agents.llm_recommender as mod
+
+    failing = DummyClient(DummyCompletions("", error=OpenAIError("API down")))
+    monkeypatch.setattr(mod, "_client", failing)
+    monkeypatch.setattr(mod, "_breaker", mod.CircuitBreaker(2, cooldown=0.05))
+    for _ in range(2):
+        with pytest.raises(APIRecommendationError):
+            recommend("X", "Y", 0.0)
+    assert mod.get_metrics()["breaker_state"] == "open"
+
+    # Open: fails without calling the API
+    calls = []
+    monkeypatch.setattr(
+        failing.chat.completions, "create", lambda **kw: calls.append(1)
+    )
+    with pytest.raises(APIRecommendationError, match="circuit breaker"):
+        recommend("X", "Y", 0.0)
+    assert calls == [] and mod.get_metrics()["fast_failed"] == 1
+
+    # After the cool-down one probe goes through and closes it
+    import time
+
+    time.sleep(0.06)
+    good_json = (
+        '{"title":"T","sentiment_score":0.5,'
+        '"recommendation":"hold","rationale":"Back."}'
+    )
+    monkeypatch.setattr(mod, "_client", DummyClient(DummyCompletions(good_json)))
+    assert recommend("X", "Y", 0.0).rationale == "Back."
+    assert mod.get_metrics()["breaker_state"] == "closed"
+    assert mod.get_metrics()["breaker_trips"] == 1
+
+
+def test_slow_call_is_hedged(monkeypatch):
+    import app.agents.llm_recommender as mod
+
+    class SlowFirstClient(AsyncDummyClient):
+        def __init__(self):
+            super().__init__()
+            self.calls = 0
+
+        async def create(self, *args, **kwargs):
+            self.calls += 1
+            self.delay = 5.0 if self.calls == 1 else 0.0
+            return await super().create(*args, **kwargs)
+
+    client = SlowFirstClient()
+    monkeypatch.setattr(mod, "_new_async_client", lambda: client)
+    monkeypatch.setattr(mod, "LLM_HEDGE_DELAY", 0.05)
+
+    (res,) = mod.recommend_many([("ok", "a", 0.1)])
+    assert isinstance(res, ArticleRecc)
+    assert client.calls == 2
+    metrics = mod.get_metrics()
+    assert metrics["hedged"] == 1 and metrics["hedge_wins"] == 1
+
+
+def test_rate_limit_wait_does_not_trigger_hedging(monkeypatch):
+    import asyncio
+
+    import app.agents.llm_recommender as mod
+
+    client = AsyncDummyClient()
+    monkeypatch.setattr(mod, "LLM_HEDGE_DELAY", 0.01)
+
+    async def run():
+        # An empty request bucket refilling at 20/s: each call waits ~50ms
+        limiter = mod.TokenBucketLimiter(requests_per_min=1200, tokens_per_min=1e9)
+        limiter._available[0] = 0.0
+        return [
+            await mod.recommend_async(client, f"ok {i}", "a", 0.1, limiter)
+            for i in range(4)
+        ]
+
+    assert all(isinstance(r, ArticleRecc) for r in asyncio.run(run()))
+    assert mod.get_metrics()["hedged"] == 0
+
+
+def test_hedge_needs_a_free_concurrency_slot(monkeypatch):
+    import asyncio
+
+    import app.agents.llm_recommender as mod
+
+    monkeypatch.setattr(mod, "LLM_HEDGE_DELAY", 0.01)
+
+    async def run(size):
+        client = AsyncDummyClient(delay=0.1)
+        slots = asyncio.Semaphore(size)
+        async with slots:  # the slot the call itself holds
+            await mod.recommend_async(client, "ok", "a", 0.1, slots=slots)
+        return client.max_in_flight
+
+    assert asyncio.run(run(1)) == 1
+    assert mod.get_metrics()["hedged"] == 0
+    assert asyncio.run(run(2)) == 2
+    assert mod.get_metrics()["hedged"] == 1
@@ -0,0 +1,283 @@
+import argparse
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import requests
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+
+import app.orchestrator as orchestrator
+from app.agents import http_client
+from app.agents.db_writer import (
+    Analysis,
+    Article,
+    ArticleTicker,
+    get_scrape_cursor,
+    get_session,
+)
+from app.agents.llm_recommender import ArticleRecc
+
+_START = datetime(2025, 6, 1, 9, 0, tzinfo=timezone.utc)
+
+
+def guardian_result(n: int) -> dict:
+    published = _START + timedelta(hours=n)
+    return {
+        "webUrl": f"https://example.com/{n}",
+        "webTitle": f"Story {n}",
+        "fields": {"bodyText": f"Body of story {n}."},
+        "webPublicationDate": published.strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }
+
+
+class DummyResponse:
+    def __init__(self, json_data=None, status_code: int = 200):
+        self._json = json_data
+        self.status_code = status_code
+        self.headers = {}
+
+    def raise_for_status(self) -> None:
+        if self.status_code != 200:
+            raise requests.HTTPError(f"Status {self.status_code}")
+
+    def json(self) -> dict:
+        return self._json
+
+    def close(self) -> None:
+        pass
+
+
+class FakeGuardian:
+    """
+    Stands in for the shared HTTP session: serves `stories[query]` (story
+    numbers) honouring order-by, from-date and paging, and answers 404 for
+    any (query, page) in `failing`.
+    """
+
+    def __init__(self, stories: dict):
+        self.stories = stories
+        self.failing = set()
+        self.requests = []
+
+    def request(self, method, url, params=None, timeout=None, headers=None):
+        query, page = params["q"], params["page"]
+        self.requests.append((query, page))
+        if (query, page) in self.failing:
+            return DummyResponse(status_code=404)
+        results = [guardian_result(n) for n in sorted(self.stories[query])]
+        if "from-date" in params:
+            results = [
+                r
+                for r in results
+                if r["webPublicationDate"][:10] >= params["from-date"]
+            ]
+        if params["order-by"] == "newest":
+            results.reverse()
+        size = params["page-size"]
+        pages = max(1, -(-len(results) // size))
+        chunk = results[(page - 1) * size : page * size]
+        return DummyResponse({"response": {"results": chunk, "pages": pages}})
+
+
+@pytest.fixture
+def guardian(monkeypatch):
+    fake = FakeGuardian({})
+    monkeypatch.setattr(http_client, "get_http_session", lambda: fake)
+    monkeypatch.setattr(http_client, "_sleep", lambda seconds: None)
+    return fake
+
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+    calls = []
+
+    def fake_recommend_many(items, use_cache=True):
+        calls.extend(title for title, _, _ in items)
+        return [
+            ArticleRecc(
+                title=title,
+                sentiment_score=score,
+                recommendation="buy",
+                rationale="Looks good.",
+            )
+            for title, _, score in items
+        ]
+
+    monkeypatch.setattr(orchestrator, "recommend_many", fake_recommend_many)
+    return calls
+
+
+@pytest.fixture
+def pipeline(session, guardian, llm_calls, monkeypatch):
+    """Run orchestrate() against the fakes and the in-memory database."""
+    monkeypatch.setenv("GUARDIAN_API_KEY", "dummy-key")
+    monkeypatch.delenv("GUARDIAN_CACHE_DIR", raising=False)
+    monkeypatch.setattr(orchestrator, "init_db", lambda *a: None)
+    monkeypatch.setattr(
+        orchestrator, "get_session", lambda: get_session("sqlite:///:memory:")
+    )
+    monkeypatch.setattr(
+        orchestrator,
+        "analyze_sentiment_batch",
+        lambda texts, **kw: [("POSITIVE", 0.5) for _ in texts],
+    )
+    return orchestrator.orchestrate
+
+
+def analysis_count(session) -> int:
+    return session.scalar(select(func.count()).select_from(Analysis))
+
+
+def cursor_url(session, query: str):
+    session.expire_all()
+    cursor = get_scrape_cursor(session, query)
+    return cursor.last_url if cursor else None
+
+
+def test_shared_article_is_analyzed_once_and_linked_to_both_tickers(
+    pipeline, guardian, llm_calls, session
+):
+    guardian.stories = {"nvidia": [1, 2], "amd": [2, 3]}
+
+    pipeline(["nvidia", "amd"], tickers={"nvidia": "NVDA", "amd": "AMD"})
+
+    assert sorted(llm_calls) == ["Story 1", "Story 2", "Story 3"]
+    assert analysis_count(session) == 3
+    shared = session.scalar(
+        select(Article.article_id).where(Article.url == "https://example.com/2")
+    )
+    tickers = session.scalars(
+        select(ArticleTicker.ticker).where(ArticleTicker.article_id == shared)
+    )
+    assert sorted(tickers) == ["AMD", "NVDA"]
+    assert cursor_url(session, "nvidia") == "https://example.com/2"
+    assert cursor_url(session, "amd") == "https://example.com/3"
+
+
+def test_queries_without_a_usable_ticker_are_not_linked(
+    pipeline, guardian, llm_calls, session
+):
+    guardian.stories = {"nvidia stock": [1], "advanced micro devices": [2]}
+
+    pipeline(
+        ["nvidia stock", "advanced micro devices"],
+        tickers={"advanced micro devices": "ADVANCED MICRO DEVICES"},
+    )
+
+    assert sorted(llm_calls) == ["Story 1", "Story 2"]
+    assert session.scalar(select(func.count()).select_from(ArticleTicker)) == 0
+
+
+def test_failed_ticker_links_do_not_abort_the_run(
+    pipeline, guardian, llm_calls, session, monkeypatch
+):
+    def broken_link(session, links):
+        raise OperationalError("INSERT", {}, Exception("value too long"))
+
+    monkeypatch.setattr(orchestrator, "link_article_tickers", broken_link)
+    guardian.stories = {"nvidia": [1, 2]}
+
+    pipeline(["nvidia"])
+
+    assert analysis_count(session) == 2
+    assert cursor_url(session, "nvidia") == "https://example.com/2"
+
+
+def test_queries_share_one_rate_limiter(pipeline, guardian, monkeypatch):
+    limiters = []
+
+    class CountingLimiter(orchestrator.RateLimiter):
+        def __init__(self, per_second=None):
+            super().__init__(per_second)
+            self.waits = 0
+            limiters.append(self)
+
+        def wait(self) -> None:
+            self.waits += 1
+            super().wait()
+
+    monkeypatch.setattr(orchestrator, "RateLimiter", CountingLimiter)
+    guardian.stories = {"nvidia": [1, 2, 3], "amd": [4, 5, 6]}
+
+    pipeline(["nvidia", "amd"], batch_size=1, max_pages=3, requests_per_second=1000)
+
+    assert len(limiters) == 1
+    assert limiters[0].interval == pytest.approx(0.001)
+    assert limiters[0].waits == len(guardian.requests) == 6
+
+
+def test_ticker_option():
+    assert orchestrator._ticker_option("amd=AMD") == ("amd", "AMD")
+    assert orchestrator._ticker_option("advanced micro devices=AMD") == (
+        "advanced micro devices",
+        "AMD",
+    )
+    for bad in ["AMD", "amd=", "=AMD", "amd=ADVANCEDMICRODEVICES"]:
+        with pytest.raises(argparse.ArgumentTypeError):
+            orchestrator._ticker_option(bad)
+
+
+@pytest.mark.parametrize("full_rescan", [False, True])
+def test_same_day_rerun_analyzes_nothing(
+    pipeline, guardian, llm_calls, session, full_rescan
+):
+    guardian.stories = {"nvidia": [1, 2, 3]}
+    pipeline(["nvidia"])
+    assert len(llm_calls) == 3
+
+    pipeline(["nvidia"], full_rescan=full_rescan)
+
+    assert len(llm_calls) == 3
+    assert analysis_count(session) == 3
+
+
+def test_failed_page_does_not_move_a_new_cursor(pipeline, guardian, session):
+    # Newest first: the gap on page 2 lies behind the newest article
+    guardian.stories = {"nvidia": [1, 2, 3, 4, 5, 6]}
+    guardian.failing = {("nvidia", 2)}
+
+    pipeline(["nvidia"], batch_size=2, max_pages=3)
+
+    assert analysis_count(session) == 4
+    assert cursor_url(session, "nvidia") is None
+
+    # The next run starts over from the newest articles and fills the gap
+    guardian.failing = set()
+    pipeline(["nvidia"], batch_size=2, max_pages=3)
+
+    assert analysis_count(session) == 6
+    assert cursor_url(session, "nvidia") == "https://example.com/6"
+
+
+def test_failed_page_holds_the_cursor_before_the_gap(pipeline, guardian, session):
+    guardian.stories = {"nvidia": [1, 2]}
+    pipeline(["nvidia"], batch_size=2)
+    assert cursor_url(session, "nvidia") == "https://example.com/2"
+
+    # Walking forward from the mark, the gap on page 3 holds it at story 4
+    guardian.stories = {"nvidia": [1, 2, 3, 4, 5, 6, 7, 8]}
+    guardian.failing = {("nvidia", 3)}
+    pipeline(["nvidia"], batch_size=2, max_pages=4)
+
+    assert cursor_url(session, "nvidia") == "https://example.com/4"
+
+    guardian.failing = set()
+    pipeline(["nvidia"], batch_size=2, max_pages=4)
+
+    assert analysis_count(session) == 8
+    assert cursor_url(session, "nvidia") == "https://example.com/8"
+
+
+def test_pages_of_already_seen_articles_do_not_stall_the_cursor(
+    pipeline, guardian, llm_calls, session
+):
+    guardian.stories = {"nvidia": [1, 2, 3, 4]}
+    pipeline(["nvidia"], batch_size=2)
+    assert cursor_url(session, "nvidia") == "https://example.com/4"
+
+    # Pages 1 and 2 of the forward walk hold nothing past the mark
+    guardian.stories = {"nvidia": [1, 2, 3, 4, 5, 6]}
+    pipeline(["nvidia"], batch_size=2)
+
+    assert llm_calls[-2:] == ["Story 5", "Story 6"]
+    assert cursor_url(session, "nvidia") == "https://example.com/6"
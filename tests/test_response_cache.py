@@ -0,0 +1,104 @@
+import os
+
+from app.agents import http_client
+from app.agents.response_cache import ResponseCache
+from app.agents.scraper import fetch_articles
+
+PAYLOAD = {
+    "response": {
+        "pages": 1,
+        "results": [
+            {
+                "webUrl": "https://example.com/a",
+                "webTitle": "Test Title A",
+                "fields": {"bodyText": "Some body text A."},
+                "webPublicationDate": "2025-06-10T12:00:00Z",
+            }
+        ],
+    }
+}
+
+
+class DummyResponse:
+    def __init__(self, json_data=None, status_code: int = 200, headers=None):
+        self._json = json_data
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def raise_for_status(self) -> None:
+        pass
+
+    def json(self) -> dict:
+        return self._json
+
+
+class RecordingSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.headers = []
+
+    def request(self, method, url, params=None, timeout=None, headers=None):
+        self.headers.append(headers)
+        return self.responses.pop(0)
+
+
+def test_key_ignores_api_key_and_param_order():
+    a = ResponseCache.key("http://x", {"q": "nvidia", "page": 1, "api-key": "one"})
+    b = ResponseCache.key("http://x", {"api-key": "two", "page": "1", "q": "nvidia"})
+    c = ResponseCache.key("http://x", {"q": "nvidia", "page": 2})
+    assert a == b
+    assert a != c
+
+
+def test_put_get_and_ttl(tmp_path):
+    cache = ResponseCache(str(tmp_path), ttl=60)
+    cache.put("k", {"v": 1}, etag='"abc"')
+    entry = cache.get("k")
+    assert entry["payload"] == {"v": 1}
+    assert entry["etag"] == '"abc"'
+    assert cache.is_fresh(entry)
+
+    entry["stored_at"] -= 120
+    assert not cache.is_fresh(entry)
+    assert cache.get("missing") is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=10**6)
+    cache.put("old", {"v": "x" * 100})
+    cache.put("new", {"v": "y" * 100})
+    os.utime(tmp_path / "old.json", (1, 1))
+    entry_size = os.path.getsize(tmp_path / "new.json")
+
+    cache.max_bytes = entry_size * 2 + entry_size // 2
+    cache.put("newest", {"v": "z" * 100})
+    assert cache.get("old") is None
+    assert cache.get("new") is not None
+    assert cache.get("newest") is not None
+
+
+def test_fetch_articles_serves_fresh_entries_from_cache(monkeypatch, tmp_path):
+    session = RecordingSession([DummyResponse(PAYLOAD)])
+    monkeypatch.setattr(http_client, "get_http_session", lambda: session)
+    cache = ResponseCache(str(tmp_path), ttl=60)
+
+    first = fetch_articles("Nvidia", "key", cache=cache)
+    second = fetch_articles("Nvidia", "other-key", cache=cache)
+    assert first == second
+    assert len(session.headers) == 1
+
+
+def test_fetch_articles_revalidates_stale_entries(monkeypatch, tmp_path):
+    session = RecordingSession(
+        [
+            DummyResponse(PAYLOAD, headers={"ETag": '"v1"'}),
+            DummyResponse(status_code=304),
+        ]
+    )
+    monkeypatch.setattr(http_client, "get_http_session", lambda: session)
+    cache = ResponseCache(str(tmp_path), ttl=0)
+
+    fetch_articles("Nvidia", "key", cache=cache)
+    articles = fetch_articles("Nvidia", "key", cache=cache)
+    assert session.headers[1] == {"If-None-Match": '"v1"'}
+    assert [a["webUrl"] for a in articles] == ["https://example.com/a"]
@@ -3,7 +3,8 @@ from datetime import date
 import pytest
 import requests
 
-from app.agents.scraper import fetch_articles
+from app.agents import http_client
+from app.agents.scraper import fetch_articles, iter_articles
 
 
 class DummyResponse:
@@ -19,6 +20,21 @@ class DummyResponse:
         return self._json
 
 
+class FakeSession:
+    """Routes the shared session's .request() to a plain get function."""
+
+    def __init__(self, get):
+        self._get = get
+
+    def request(self, method, url, params=None, timeout=None, headers=None):
+        return self._get(url, params=params, timeout=timeout)
+
+
+def patch_get(monkeypatch, fake_get):
+    monkeypatch.setattr(http_client, "get_http_session", lambda: FakeSession(fake_get))
+    monkeypatch.setattr(http_client, "_sleep", lambda seconds: None)
+
+
 @pytest.fixture
 def sample_payload() -> dict:
     return {
@@ -47,7 +63,7 @@ def test_fetch_articles_happy_path(monkeypatch, sample_payload):
         assert params["q"] == "Nvidia"
         return DummyResponse(sample_payload)
 
-    monkeypatch.setattr("requests.get", fake_get)
+    patch_get(monkeypatch, fake_get)
 
     articles = fetch_articles("Nvidia", "dummy-key", page_size=2)
     assert len(articles) == 2
@@ -67,7 +83,7 @@ def test_fetch_articles_api_error(monkeypatch):
     def broken_get(*args, **kwargs):
         raise requests.ConnectionError("fail")
 
-    monkeypatch.setattr("requests.get", broken_get)
+    patch_get(monkeypatch, broken_get)
     result = fetch_articles("Anything", "key", page_size=5)
     assert result == []
 
@@ -77,6 +93,158 @@ def test_fetch_articles_bad_json(monkeypatch):
         def json(self):
             raise ValueError("not json")
 
-    monkeypatch.setattr("requests.get", lambda *args, **kwargs: BadResponse({}))
+    patch_get(monkeypatch, lambda *args, **kwargs: BadResponse({}))
     result = fetch_articles("X", "key", page_size=5)
     assert result == []
+
+
+def _page(page: int, pages: int, stamps) -> dict:
+    return {
+        "response": {
+            "pages": pages,
+            "results": [
+                {
+                    "webUrl": f"https://example.com/{page}-{i}",
+                    "webTitle": f"Title {page}-{i}",
+                    "fields": {"bodyText": "Body."},
+                    "webPublicationDate": stamp,
+                }
+                for i, stamp in enumerate(stamps)
+            ],
+        }
+    }
+
+
+def test_fetch_articles_walks_pages(monkeypatch):
+    pages = {
+        1: _page(1, 3, ["2025-06-12T10:00:00Z", "2025-06-11T10:00:00Z"]),
+        2: _page(2, 3, ["2025-06-10T10:00:00Z", "2025-06-09T10:00:00Z"]),
+        3: _page(3, 3, ["2025-06-08T10:00:00Z"]),
+    }
+    requested = []
+
+    def fake_get(url: str, params: dict, timeout: float):
+        requested.append(params["page"])
+        return DummyResponse(pages[params["page"]])
+
+    patch_get(monkeypatch, fake_get)
+
+    articles = fetch_articles("Nvidia", "key", page_size=2, max_pages=10)
+    assert sorted(requested) == [1, 2, 3]
+    assert [a["publishDate"].day for a in articles] == [12, 11, 10, 9, 8]
+
+
+def test_fetch_articles_respects_max_pages(monkeypatch):
+    requested = []
+
+    def fake_get(url: str, params: dict, timeout: float):
+        requested.append(params["page"])
+        return DummyResponse(_page(params["page"], 50, ["2025-06-12T10:00:00Z"]))
+
+    patch_get(monkeypatch, fake_get)
+
+    articles = fetch_articles("Nvidia", "key", page_size=1, max_pages=3)
+    assert sorted(requested) == [1, 2, 3]
+    assert len(articles) == 3
+
+
+def test_fetch_articles_keeps_pages_that_succeeded(monkeypatch):
+    def flaky_get(url: str, params: dict, timeout: float):
+        if params["page"] == 2:
+            raise requests.ConnectionError("fail")
+        return DummyResponse(_page(params["page"], 3, ["2025-06-12T10:00:00Z"]))
+
+    patch_get(monkeypatch, flaky_get)
+
+    articles = fetch_articles("Nvidia", "key", page_size=1, max_pages=3)
+    assert [a["webUrl"] for a in articles] == [
+        "https://example.com/1-0",
+        "https://example.com/3-0",
+    ]
+
+
+def test_iter_articles_reports_failed_pages_in_stream_order(monkeypatch):
+    def flaky_get(url: str, params: dict, timeout: float):
+        if params["page"] == 2:
+            raise requests.ConnectionError("fail")
+        return DummyResponse(_page(params["page"], 3, ["2025-06-12T10:00:00Z"]))
+
+    patch_get(monkeypatch, flaky_get)
+
+    failed = []
+    stream = iter_articles(
+        "Nvidia", "key", page_size=1, max_pages=3, failed_pages=failed
+    )
+    seen = [(art["webUrl"], list(failed)) for art in stream]
+    assert seen == [
+        ("https://example.com/1-0", []),
+        ("https://example.com/3-0", [2]),
+    ]
+
+
+def test_iter_articles_pages_past_already_seen_articles(monkeypatch):
+    def fake_get(url: str, params: dict, timeout: float):
+        return DummyResponse(_page(params["page"], 5, ["2025-06-12T10:00:00Z"]))
+
+    patch_get(monkeypatch, fake_get)
+
+    handled = {"https://example.com/1-0", "https://example.com/2-0"}
+    stream = iter_articles(
+        "Nvidia",
+        "key",
+        page_size=1,
+        max_pages=1,
+        already_seen=lambda art: art["webUrl"] in handled,
+    )
+    assert [a["webUrl"] for a in stream] == ["https://example.com/3-0"]
+
+
+def test_fetch_articles_passes_from_date(monkeypatch, sample_payload):
+    def fake_get(url: str, params: dict, timeout: float):
+        assert params["from-date"] == "2025-06-10"
+        assert params["order-by"] == "oldest"
+        return DummyResponse(sample_payload)
+
+    patch_get(monkeypatch, fake_get)
+
+    articles = fetch_articles(
+        "Nvidia", "key", from_date=date(2025, 6, 10), order_by="oldest"
+    )
+    assert articles[1]["publishedAt"].isoformat() == "2025-06-11T15:30:00+00:00"
+
+
+def test_iter_articles_yields_before_later_pages(monkeypatch):
+    requested = []
+
+    def fake_get(url: str, params: dict, timeout: float):
+        requested.append(params["page"])
+        return DummyResponse(_page(params["page"], 3, ["2025-06-12T10:00:00Z"]))
+
+    patch_get(monkeypatch, fake_get)
+
+    stream = iter_articles("Nvidia", "key", page_size=1, max_pages=3)
+    first = next(stream)
+    assert first["webUrl"] == "https://example.com/1-0"
+    assert requested == [1]
+
+    rest = list(stream)
+    assert [a["webUrl"] for a in rest] == [
+        "https://example.com/2-0",
+        "https://example.com/3-0",
+    ]
+
+
+def test_fetch_articles_against_fake_guardian(monkeypatch):
+    from app.agents import scraper
+    from scripts.fake_guardian import FakeGuardianServer
+
+    server = FakeGuardianServer(pages=3, body_words=5).start()
+    try:
+        monkeypatch.setattr(scraper, "GUARDIAN_URL", server.url)
+        articles = fetch_articles("bench", "key", page_size=4, max_pages=5)
+    finally:
+        server.stop()
+
+    assert len(articles) == 12
+    assert server.requests == 3
+    assert articles[0]["webUrl"].endswith("/article/0")
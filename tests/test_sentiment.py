@@ -1,4 +1,15 @@
-from app.agents.sentiment import analyze_sentiment
+import pytest
+
+from app.agents import sentiment
+from app.agents.sentiment import (
+    _aggregate,
+    _token_batches,
+    _window_size,
+    _windows,
+    analyze_document,
+    analyze_sentiment,
+    analyze_sentiment_batch,
+)
 
 
 def test_analyze_sentiment_positive():
@@ -21,3 +32,122 @@ def test_analyze_sentiment_neutral_or_fallback():
     label, score = analyze_sentiment(text)
     assert isinstance(label, str)
     assert isinstance(score, float)
+
+
+def test_analyze_sentiment_batch_matches_single_calls():
+    texts = [
+        "I absolutely love this product! It works great and makes life easier.",
+        "This was the worst experience ever. I hate how buggy and slow it is.",
+        "",
+    ]
+    batched = analyze_sentiment_batch(texts, batch_size=2)
+    assert [label for label, _ in batched] == [analyze_sentiment(t)[0] for t in texts]
+    for (_, score), text in zip(batched, texts):
+        assert score == pytest.approx(analyze_sentiment(text)[1], abs=1e-4)
+
+
+def test_analyze_sentiment_batch_empty():
+    assert analyze_sentiment_batch([]) == []
+
+
+def test_windows_cover_document_with_overlap():
+    ids = list(range(25))
+    windows = _windows(ids, size=10, overlap=4, max_windows=10)
+    assert windows[0] == list(range(10))
+    assert windows[-1][-1] == 24
+    assert all(len(w) == 10 for w in windows)
+    assert windows[1][:4] == windows[0][-4:]
+
+
+def test_windows_short_document_and_cap():
+    assert _windows([1, 2, 3], size=10, overlap=4, max_windows=4) == [[1, 2, 3]]
+    capped = _windows(list(range(1000)), size=10, overlap=0, max_windows=3)
+    assert len(capped) == 3
+    assert capped[0][0] == 0
+    assert capped[-1][-1] == 999
+
+
+def test_window_size_is_capped_for_tokenizers_without_a_limit():
+    class Tokenizer:
+        model_max_length = int(1e30)  # transformers' "unset" value
+
+        def num_special_tokens_to_add(self):
+            return 2
+
+    assert _window_size(Tokenizer()) == 510
+    Tokenizer.model_max_length = 128
+    assert _window_size(Tokenizer()) == 126
+
+
+def test_aggregate_mean_and_max():
+    probs = [[0.9, 0.1], [0.2, 0.8], [0.3, 0.7]]
+    idx, score = _aggregate(probs, [10, 1, 1], "mean")
+    assert idx == 0
+    assert score == pytest.approx((9 + 0.2 + 0.3) / 12)
+    assert _aggregate(probs, [10, 1, 1], "max") == (0, 0.9)
+    with pytest.raises(ValueError):
+        _aggregate(probs, [1, 1, 1], "median")
+
+
+def test_analyze_document_reads_past_the_lede():
+    lede = "The company reported results today. " * 5
+    body = "I hate how buggy and slow it is. This was the worst experience ever. " * 80
+    label, score = analyze_document(lede + body)
+    assert label == "NEGATIVE"
+    assert 0.0 <= score <= 1.0
+
+
+def test_cached_scoring_skips_unchanged_text(session):
+    calls = []
+
+    def fake_score(texts):
+        calls.append(list(texts))
+        return [("POSITIVE", 0.75) for _ in texts]
+
+    before = sentiment.get_cache_stats()
+    first = sentiment._with_cache(["a  b", "c", "a b"], session, "test", fake_score)
+    second = sentiment._with_cache([" a b ", "c"], session, "test", fake_score)
+
+    assert first == [("POSITIVE", 0.75)] * 3
+    assert second == [("POSITIVE", 0.75)] * 2
+    assert calls == [["a  b", "c"]]
+    after = sentiment.get_cache_stats()
+    assert after["misses"] - before["misses"] == 3
+    assert after["hits"] - before["hits"] == 2
+
+
+def test_backend_id_and_unknown_backend(monkeypatch):
+    monkeypatch.setattr(sentiment, "BACKEND", "onnx")
+    monkeypatch.setattr(sentiment, "QUANTIZE", True)
+    assert sentiment.backend_id() == "onnx-int8"
+
+    monkeypatch.setattr(sentiment, "BACKEND", "tensorrt")
+    monkeypatch.setattr(sentiment, "_hf", None)
+    with pytest.raises(ValueError):
+        sentiment.get_pipeline()
+
+
+def test_sentiment_pool_matches_in_process_scoring():
+    texts = [
+        "Shares soared after a blowout quarter.",
+        "The company issued a grim profit warning.",
+        "Investors cheered the new product launch.",
+    ] * 3
+    with sentiment.SentimentPool(workers=2, threads=1, chunk_size=2) as pool:
+        results = pool.score(texts, batch_size=2)
+    assert [label for label, _ in results] == [
+        label for label, _ in analyze_sentiment_batch(texts)
+    ]
+
+
+def test_token_batches_bucket_by_length_under_budget():
+    lengths = [500, 10, 12, 480, 11, 30]
+    batches = _token_batches(lengths, max_tokens=1000, max_batch=3)
+    # Every input exactly once, short ones together, long ones apart
+    assert sorted(i for b in batches for i in b) == list(range(len(lengths)))
+    assert batches[0] == [1, 4, 2]
+    for batch in batches:
+        assert len(batch) <= 3
+        assert len(batch) * max(lengths[i] for i in batch) <= 1000
+    # A single input longer than the budget still gets its own batch
+    assert _token_batches([2000], max_tokens=1000, max_batch=4) == [[0]]
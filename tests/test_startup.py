@@ -0,0 +1,37 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Importing the app and agents must not pull these in before first use,
+# and must work without OPENAI_API_KEY
+HEAVY_MODULES = ["transformers", "torch", "sklearn", "scipy"]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app.web
+import app.agents.sentiment
+import app.agents.llm_recommender
+app.web.create_app()
+elapsed = time.perf_counter() - start
+heavy = [m for m in json.loads(sys.argv[1]) if m in sys.modules]
+print(json.dumps({"seconds": elapsed, "heavy": heavy}))
+"""
+
+
+def test_startup_is_lazy_and_fast():
+    env = {k: v for k, v in os.environ.items() if k != "OPENAI_API_KEY"}
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE, json.dumps(HEAVY_MODULES)],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    assert result["heavy"] == []
+    assert result["seconds"] < 5.0, result